@@ -0,0 +1,211 @@
+# Throughput and latency of the three ways an endpoint can wait on I/O, under
+# the same load. Each variant is its own app, served by uvicorn in a thread
+# of this process and driven over real sockets at fixed concurrency levels
+# by an async load generator. The generator runs in a child process: sharing
+# the server's GIL would add thread switch stalls to every latency.
+#
+#   sync            def + time.sleep          runs in the threadpool
+#   async           async def + asyncio.sleep awaits, like async_main.py
+#   async-blocking  async def + time.sleep    holds the event loop
+#
+#   python sync-async-benchmark.py
+#   python sync-async-benchmark.py --io-ms 50 --threadpool 40 --concurrency 1 10 40 100 200 --csv results.csv
+#
+# 'ideal' is the best possible rps if only waiting cost time: the threadpool
+# caps sync at threadpool / io, a blocked loop caps async-blocking at 1 / io.
+# The gap between ideal and measured is what the framework and the
+# threadpool hand-off cost, plus the load generator when both share cores.
+import re
+import csv
+import json
+import time
+import socket
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+import anyio.to_thread
+import uvicorn
+from fastapi import FastAPI
+
+
+def make_app(variant: str, io_seconds: float, threadpool: int):
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # sync endpoints share this many worker threads (40 by default)
+        anyio.to_thread.current_default_thread_limiter().total_tokens = threadpool
+        yield
+
+    app = FastAPI(lifespan=lifespan)
+
+    if variant == 'sync':
+        @app.get('/io')
+        def io():
+            time.sleep(io_seconds)
+            return {'variant': variant}
+    elif variant == 'async':
+        @app.get('/io')
+        async def io():
+            await asyncio.sleep(io_seconds)
+            return {'variant': variant}
+    else:
+        @app.get('/io')
+        async def io():
+            time.sleep(io_seconds)  # blocks every other request too
+            return {'variant': variant}
+
+    return app
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+# uvicorn on its own event loop in a background thread
+class InProcessServer:
+    def __init__(self, app: FastAPI):
+        self.port = free_port()
+        config = uvicorn.Config(app, host='127.0.0.1', port=self.port, log_level='warning', access_log=False, backlog=4096)
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self.port
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+def percentile(values, q: float):
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+CONTENT_LENGTH = re.compile(rb'content-length:\s*(\d+)', re.IGNORECASE)
+
+
+# One keep-alive HTTP/1.1 connection per client. httpx's connection pool
+# tops out at a few hundred rps once a few dozen requests share one loop,
+# which would cap the async variant below what the server can do.
+class Connection:
+    def __init__(self, port: int):
+        self.port = port
+        self.reader = self.writer = None
+
+    async def get(self, path: str):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection('127.0.0.1', self.port)
+        try:
+            self.writer.write(f'GET {path} HTTP/1.1\r\nHost: bench\r\n\r\n'.encode())
+            head = await self.reader.readuntil(b'\r\n\r\n')
+            await self.reader.readexactly(int(CONTENT_LENGTH.search(head).group(1)))
+            return int(head.split(b' ', 2)[1])
+        except (OSError, asyncio.IncompleteReadError):
+            self.close()
+            raise
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+# `concurrency` clients, each sending its next request as soon as the last
+# one returns; only requests that finish within `duration` seconds after a
+# short warm-up are counted
+async def drive(port: int, concurrency: int, duration: float, warmup: float):
+    latencies, errors = [], 0
+    loop = asyncio.get_running_loop()
+    measure_from = loop.time() + warmup
+    stop_at = measure_from + duration
+
+    async def worker():
+        nonlocal errors
+        connection = Connection(port)
+        while loop.time() < stop_at:
+            start = time.perf_counter()
+            try:
+                ok = await connection.get('/io') == 200
+            except (OSError, asyncio.IncompleteReadError):
+                ok = False
+            if not measure_from <= loop.time() <= stop_at:
+                continue
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+        connection.close()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    latencies.sort()
+    return {
+        'rps': len(latencies) / duration,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'errors': errors
+    }
+
+
+def ideal_rps(variant: str, concurrency: int, io_seconds: float, threadpool: int):
+    parallel = {'sync': min(concurrency, threadpool), 'async': concurrency, 'async-blocking': 1}[variant]
+    return parallel / io_seconds
+
+
+def drive_in_process(port: int, concurrency: int, duration: float, warmup: float):
+    return asyncio.run(drive(port, concurrency, duration, warmup))
+
+
+def run(variants, levels, io_seconds: float, threadpool: int, duration: float, warmup: float):
+    rows = []
+    generator = ProcessPoolExecutor(max_workers=1)
+    for variant in variants:
+        print(f'\n{variant} (io {io_seconds * 1000:.0f} ms, threadpool {threadpool})')
+        print(f'{"concurrency":>11} {"rps":>9} {"ideal":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"errors":>7}')
+        with InProcessServer(make_app(variant, io_seconds, threadpool)) as port:
+            for concurrency in levels:
+                result = generator.submit(drive_in_process, port, concurrency, duration, warmup).result()
+                row = {
+                    'variant': variant,
+                    'concurrency': concurrency,
+                    'ideal_rps': ideal_rps(variant, concurrency, io_seconds, threadpool),
+                    **result
+                }
+                rows.append(row)
+                print(
+                    f'{concurrency:>11} {row["rps"]:>9.1f} {row["ideal_rps"]:>9.1f} {row["p50_ms"]:>9.1f} '
+                    f'{row["p95_ms"]:>9.1f} {row["p99_ms"]:>9.1f} {row["errors"]:>7}'
+                )
+    generator.shutdown()
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--variants', nargs='+', default=['sync', 'async', 'async-blocking'], choices=['sync', 'async', 'async-blocking'])
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 10, 40, 100, 200])
+    parser.add_argument('--io-ms', type=float, default=50)
+    parser.add_argument('--threadpool', type=int, default=40)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--warmup', type=float, default=1)
+    parser.add_argument('--csv', help='write one row per variant and concurrency level')
+    parser.add_argument('--json')
+    args = parser.parse_args()
+
+    rows = run(args.variants, args.concurrency, args.io_ms / 1000, args.threadpool, args.duration, args.warmup)
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=2)
@@ -1,12 +1,22 @@
+import os
+import sys
 import models, schemas, crud
 from fastapi import FastAPI, HTTPException, Depends
 from sqlalchemy.orm import Session
 from database import engine, SessionLocal, Base
 from typing import List
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '8. Performance Optimization and Monitoring')))
+
+from perfkit.tracing import setup_tracing
+
 Base.metadata.create_all(bind=engine)
 
 app = FastAPI()
+# opt-in OpenTelemetry tracing, one span per request with a child span per
+# SQL statement:
+#   TRACING=1 TRACING_EXPORTER=console|file|otlp TRACING_SAMPLE_RATIO=0.1 uvicorn main:app
+setup_tracing(app, 'crud-app', sqlalchemy_engine=engine)
 
 
 # dependency with the DB
@@ -1,24 +1,54 @@
+import os
+import sys
 import time
-from fastapi import FastAPI, Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import FastAPI, Depends
+from prometheus_client import make_asgi_app
 
-app = FastAPI()
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '8. Performance Optimization and Monitoring')))
 
+from perfkit.cpu_pool import cpu_pool_lifespan, run_cpu_bound
 
-class TimerMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        response = await call_next(request)
-        duration = time.time() - start_time
-        print(f'Request: {request.url.path} processed in {duration:.5f} seconds')
-        return response
+# CPU-heavy work goes to a bounded pool of worker processes so the event
+# loop stays free; past CPU_POOL_MAX_QUEUE waiting tasks requests get 503
+# with Retry-After, and cpu_pool_saturation_ratio shows up on /metrics
+app = FastAPI(lifespan=cpu_pool_lifespan)
+app.mount('/metrics', make_asgi_app())
+
+
+# Pure ASGI middleware: wraps `send` instead of building Request/Response
+# objects, so it costs almost nothing per request and streaming responses
+# pass through untouched. The duration is sent back in a Server-Timing
+# header (shown by the browser dev tools) instead of being printed.
+class TimerMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        start_time = time.perf_counter_ns()
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                duration_ms = (time.perf_counter_ns() - start_time) / 1e6
+                headers = list(message.get('headers', []))
+                headers.append((b'server-timing', f'app;dur={duration_ms:.3f}'.encode()))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
 
 
 app.add_middleware(TimerMiddleware)
 
 
-@app.get('/hello')
-async def hello():
+def busy_loop():
     for _ in range(10000000):
         pass
-    return {'message': 'Hello World!'}
\ No newline at end of file
+
+
+@app.get('/hello')
+async def hello(run_cpu_bound=Depends(run_cpu_bound)):
+    await run_cpu_bound(busy_loop)
+    return {'message': 'Hello World!'}
@@ -0,0 +1,55 @@
+# Micro-benchmark of the old SHA-256/JSON cache keys against perfkit.keys.
+#
+#   python benchmarks/cache_keys.py
+import os
+import sys
+import json
+import timeit
+import hashlib
+from pydantic import BaseModel
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from perfkit.keys import FloatVectorKey, int_key, xxhash
+
+
+class IrisFlower(BaseModel):
+    SepalLengthCm: float
+    SepalWidthCm: float
+    PetalLengthCm: float
+    PetalWidthCm: float
+
+    def to_list(self):
+        return [self.SepalLengthCm, self.SepalWidthCm, self.PetalLengthCm, self.PetalWidthCm]
+
+
+def old_iris_key(flower: IrisFlower):
+    raw = json.dumps(flower.model_dump(), sort_keys=True)
+    return f"Predict: {hashlib.sha256(raw.encode()).hexdigest()}"
+
+
+def old_user_key(user_id: int):
+    raw = f"user:{user_id}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def main(number: int = 200000):
+    flower = IrisFlower(SepalLengthCm=5.1, SepalWidthCm=3.5, PetalLengthCm=1.4, PetalWidthCm=0.2)
+    hashers = ['sha256', 'blake2b'] + (['xxhash'] if xxhash is not None else [])
+
+    cases = [('iris json + sha256', lambda: old_iris_key(flower))]
+    for hasher in hashers:
+        # key builders are created once per app, so keep that out of the timing
+        builder = FloatVectorKey('predict', 4, hasher)
+        cases.append((f'iris struct + {hasher}', lambda builder=builder: builder(flower.to_list())))
+    cases.append(('user sha256', lambda: old_user_key(42)))
+    cases.append(('user plain', lambda: int_key('user', 42)))
+
+    print(f'{"key":<24} {"ns/key":>10}')
+    for name, fn in cases:
+        seconds = min(timeit.repeat(fn, number=number, repeat=3))
+        print(f'{name:<24} {seconds / number * 1e9:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
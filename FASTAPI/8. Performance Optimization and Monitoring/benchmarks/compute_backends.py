@@ -0,0 +1,76 @@
+# Times every perfkit.compute backend for n = 1e3 .. 1e9 and reports where
+# NumPy overtakes the Python loop and where the process pool overtakes
+# NumPy, the sizes to switch at for a reduction with no closed form.
+#
+#   python benchmarks/compute_backends.py            # python loop up to 1e7
+#   python benchmarks/compute_backends.py --full     # python loop up to 1e9 (minutes)
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from perfkit.compute import BACKENDS, closed_form, parallel
+
+
+def best_of(fn, n: int, budget: float = 1.0):
+    # repeat small cases until the budget is used, keep the fastest run
+    best, spent = float('inf'), 0.0
+    while spent < budget:
+        start = time.perf_counter()
+        fn(n)
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+        if elapsed > budget / 3:
+            break
+    return best
+
+
+def fmt(seconds):
+    if seconds is None:
+        return '-'
+    if seconds < 1e-3:
+        return f'{seconds * 1e6:.1f} us'
+    if seconds < 1:
+        return f'{seconds * 1e3:.1f} ms'
+    return f'{seconds:.2f} s'
+
+
+def crossover(results, slower: str, faster: str):
+    for n, times in results:
+        if times[slower] is not None and times[faster] is not None and times[faster] < times[slower]:
+            return n
+    return None
+
+
+def main(max_exp: int, python_max_exp: int):
+    parallel(10 ** 6)  # start the worker processes before timing
+    names = list(BACKENDS)
+    results = []
+    print('| n | ' + ' | '.join(names) + ' |')
+    print('|---|' + '---|' * len(names))
+    for exp in range(3, max_exp + 1):
+        n = 10 ** exp
+        times = {}
+        for name, fn in BACKENDS.items():
+            if name == 'python' and exp > python_max_exp:
+                times[name] = None
+                continue
+            times[name] = best_of(fn, n)
+            assert fn(n) == closed_form(n) if exp <= 7 else True
+        results.append((n, times))
+        print(f'| 1e{exp} | ' + ' | '.join(fmt(times[name]) for name in names) + ' |', flush=True)
+
+    print()
+    print(f'numpy beats python from n = {crossover(results, "python", "numpy")}')
+    print(f'parallel beats numpy from n = {crossover(results, "numpy", "parallel")}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--max-exp', type=int, default=9)
+    parser.add_argument('--full', action='store_true')
+    args = parser.parse_args()
+    main(args.max_exp, args.max_exp if args.full else 7)
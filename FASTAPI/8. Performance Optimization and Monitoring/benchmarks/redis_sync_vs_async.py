@@ -0,0 +1,74 @@
+# Compares a sync redis.Redis probe against the shared redis.asyncio pool
+# inside async endpoints. Needs a running Redis:
+#
+#   python benchmarks/redis_sync_vs_async.py --concurrency 200 --requests 5000
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+import httpx
+import redis
+from fastapi import FastAPI
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from perfkit.redis_pool import REDIS_URL, get_redis, close_redis
+
+sync_client = redis.Redis.from_url(REDIS_URL)
+async_client = get_redis()
+
+app = FastAPI()
+
+
+@app.get('/sync-probe')
+async def sync_probe():
+    # blocks the event loop for a full Redis round-trip
+    return {'hit': sync_client.get('bench:key') is not None}
+
+
+@app.get('/async-probe')
+async def async_probe():
+    return {'hit': await async_client.get('bench:key') is not None}
+
+
+async def drive(path: str, concurrency: int, total: int):
+    latencies = []
+    remaining = iter(range(total))
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        async def worker():
+            for _ in remaining:
+                start = time.perf_counter()
+                await client.get(path)
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'rps': total / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p99': latencies[int(len(latencies) * 0.99) - 1] * 1000
+    }
+
+
+async def main(concurrency: int, total: int):
+    sync_client.set('bench:key', 'value')
+    print(f'{"client":<8} {"rps":>10} {"p50 ms":>10} {"p99 ms":>10}')
+    for name, path in (('sync', '/sync-probe'), ('async', '/async-probe')):
+        result = await drive(path, concurrency, total)
+        print(f'{name:<8} {result["rps"]:>10.0f} {result["p50"]:>10.2f} {result["p99"]:>10.2f}')
+    await close_redis()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.requests))
@@ -0,0 +1,56 @@
+# Bytes stored and decode time per cache hit for each serializer backend,
+# using jsonplaceholder-style posts.
+#
+#   python benchmarks/serializers.py
+import os
+import sys
+import json
+import timeit
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from perfkit.serializers import Serializer
+
+POST = {
+    'userId': 1,
+    'id': 1,
+    'title': 'sunt aut facere repellat provident occaecati excepturi optio reprehenderit',
+    'body': (
+        'quia et suscipit\nsuscipit recusandae consequuntur expedita et cum\n'
+        'reprehenderit molestiae ut ut quas totam\nnostrum rerum est autem sunt rem eveniet architecto'
+    )
+}
+
+PAYLOADS = {
+    'single post': POST,
+    '100 posts': [dict(POST, id=i) for i in range(100)]
+}
+
+
+def main(number: int = 20000):
+    backends = [
+        ('json (legacy)', None),
+        ('json', Serializer('json', compress_threshold=None)),
+        ('orjson', Serializer('orjson', compress_threshold=None)),
+        ('msgpack', Serializer('msgpack', compress_threshold=None)),
+        ('orjson + zstd', Serializer('orjson', compress_threshold=1024)),
+        ('msgpack + zstd', Serializer('msgpack', compress_threshold=1024))
+    ]
+
+    for payload_name, payload in PAYLOADS.items():
+        print(f'\n{payload_name}')
+        print(f'{"backend":<16} {"bytes":>8} {"decode us":>10}')
+        runs = number if payload_name == 'single post' else number // 100
+        for name, serializer in backends:
+            if serializer is None:
+                data = json.dumps(payload).encode()
+                decode = lambda: json.loads(data)
+            else:
+                data = serializer.dumps(payload)
+                decode = lambda: serializer.loads(data)
+            seconds = min(timeit.repeat(decode, number=runs, repeat=3))
+            print(f'{name:<16} {len(data):>8} {seconds / runs * 1e6:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
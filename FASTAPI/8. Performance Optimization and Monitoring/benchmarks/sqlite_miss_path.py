@@ -0,0 +1,82 @@
+# Miss-path cost of db-caching: connect-per-request against the
+# thread-local ConnectionManager, with threads standing in for the
+# FastAPI threadpool.
+#
+#   python benchmarks/sqlite_miss_path.py --threads 8 --lookups 5000
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'caching', 'db-caching')))
+
+from database import ConnectionManager
+
+QUERY = "SELECT * FROM users WHERE id = ?"
+
+
+def populate(path: str, users: int):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users(id INTEGER PRIMARY KEY, name TEXT NOT NULL, age INTEGER)")
+    conn.executemany("INSERT INTO users VALUES (?, ?, ?)", ((i, f'user{i}', i % 80) for i in range(users)))
+    conn.commit()
+    conn.close()
+
+
+def connect_per_request(path: str):
+    def lookup(user_id):
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        row = conn.execute(QUERY, (user_id,)).fetchone()
+        conn.close()
+        return row
+    return lookup
+
+
+def pooled(manager: ConnectionManager):
+    def lookup(user_id):
+        return manager.connection().execute(QUERY, (user_id,)).fetchone()
+    return lookup
+
+
+def run(lookup, threads: int, lookups: int, users: int):
+    def worker(_):
+        latencies = []
+        for _ in range(lookups):
+            start = time.perf_counter()
+            lookup(random.randrange(users))
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        latencies = sorted(l for chunk in pool.map(worker, range(threads)) for l in chunk)
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main(threads: int, lookups: int, users: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.sqlite3')
+        populate(path, users)
+        manager = ConnectionManager(path)
+
+        print(f'{"strategy":<22} {"lookups/s":>10} {"p50 us":>8} {"p99 us":>8}')
+        for name, lookup in (('connect per request', connect_per_request(path)), ('thread-local pooled', pooled(manager))):
+            rate, p50, p99 = run(lookup, threads, lookups, users)
+            print(f'{name:<22} {rate:>10.0f} {p50 * 1e6:>8.0f} {p99 * 1e6:>8.0f}')
+        manager.close_all()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--lookups', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=10000)
+    args = parser.parse_args()
+    main(args.threads, args.lookups, args.users)
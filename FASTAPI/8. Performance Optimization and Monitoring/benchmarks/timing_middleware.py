@@ -0,0 +1,85 @@
+# Per-request cost of the old BaseHTTPMiddleware timer against the pure ASGI
+# ServerTimingMiddleware, on a trivial endpoint so the middleware dominates:
+#
+#   python benchmarks/timing_middleware.py --concurrency 50 --requests 20000
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+import httpx
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from perfkit.server_timing import ServerTimingMiddleware
+
+
+# the previous TimerMiddleware, minus the print so only the middleware is measured
+class BaseHTTPTimer(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        response.headers['Server-Timing'] = f'app;dur={(time.time() - start_time) * 1000:.3f}'
+        return response
+
+
+def make_app(middleware=None):
+    app = FastAPI()
+    if middleware is not None:
+        app.add_middleware(middleware)
+
+    @app.get('/ping')
+    async def ping():
+        return {'ok': True}
+
+    return app
+
+
+async def drive(app, concurrency: int, total: int):
+    latencies = []
+    remaining = iter(range(total))
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        async def worker():
+            for _ in remaining:
+                start = time.perf_counter()
+                await client.get('/ping')
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'rps': total / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p99': latencies[int(len(latencies) * 0.99) - 1] * 1000
+    }
+
+
+async def main(concurrency: int, total: int):
+    variants = (
+        ('none', None),
+        ('basehttp', BaseHTTPTimer),
+        ('pure-asgi', ServerTimingMiddleware)
+    )
+    print(f'{"middleware":<12} {"rps":>10} {"p50 ms":>10} {"p99 ms":>10}')
+    for name, middleware in variants:
+        app = make_app(middleware)
+        # warm-up pass so route and middleware stacks are built
+        await drive(app, concurrency, min(total, 1000))
+        result = await drive(app, concurrency, total)
+        print(f'{name:<12} {result["rps"]:>10.0f} {result["p50"]:>10.2f} {result["p99"]:>10.2f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.requests))
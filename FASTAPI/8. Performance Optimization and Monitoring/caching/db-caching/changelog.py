@@ -0,0 +1,70 @@
+import time
+import uuid
+import asyncio
+import logging
+from database import db, changes_since, prune_changes
+
+logger = logging.getLogger('changelog')
+
+LAST_SEQ_KEY = 'user_changes:last_seq'
+LEADER_KEY = 'user_changes:tailer'
+
+
+# Follows the user_changes table and calls on_change for every user id that
+# any writer touched. Only one worker tails at a time (a short Redis lease),
+# and the last processed seq lives in Redis so a new leader resumes from it.
+class ChangeLogTailer:
+    def __init__(self, redis_client, on_change, interval: float = 1.0, lease: int = 10, retention: float = 3600):
+        self.redis = redis_client
+        self.on_change = on_change
+        self.interval = interval
+        self.lease = lease
+        self.retention = retention
+        self.token = uuid.uuid4().hex
+        self._task = None
+
+    def _is_leader(self):
+        if self.redis.set(LEADER_KEY, self.token, nx=True, ex=self.lease):
+            return True
+        owner = self.redis.get(LEADER_KEY)
+        if owner is not None and owner.decode() == self.token:
+            self.redis.expire(LEADER_KEY, self.lease)
+            return True
+        return False
+
+    def poll_once(self):
+        if not self._is_leader():
+            return 0
+
+        last_seq = int(self.redis.get(LAST_SEQ_KEY) or 0)
+        rows = changes_since(db.connection(), last_seq)
+        if not rows:
+            return 0
+
+        for user_id in dict.fromkeys(row['user_id'] for row in rows):
+            self.on_change(user_id)
+
+        last_seq = rows[-1]['seq']
+        self.redis.set(LAST_SEQ_KEY, last_seq)
+        prune_changes(db.connection(), last_seq, time.time() - self.retention)
+        return len(rows)
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.poll_once)
+            except Exception:
+                logger.exception('Change log poll failed')
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import threading
+
+DATABASE_PATH = os.getenv('USERS_DB_PATH', 'db.sqlite3')
+MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+CACHED_STATEMENTS = int(os.getenv('SQLITE_CACHED_STATEMENTS', '128'))
+
+
+# one long-lived connection per threadpool thread instead of a
+# connect/close per cache miss; sqlite3 keeps compiled statements per
+# connection, so reusing it also reuses the prepared SELECT
+class ConnectionManager:
+    def __init__(self, path: str = DATABASE_PATH, mmap_size: int = MMAP_SIZE, cached_statements: int = CACHED_STATEMENTS):
+        self.path = path
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # check_same_thread is off only so close_all can run from the main
+        # thread at shutdown; each connection is otherwise used by one thread
+        conn = sqlite3.connect(self.path, cached_statements=self.cached_statements, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA mmap_size={self.mmap_size}')
+        return conn
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close_all(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+db = ConnectionManager()
+
+
+# set up database; safe to run on every start
+def init_db():
+    conn = db.connection()
+    conn.execute("""
+CREATE TABLE IF NOT EXISTS users(
+                   id INTEGER PRIMARY KEY,
+                   name TEXT NOT NULL,
+                   age INTEGER
+                   )
+""")
+    # every write to users, from this app or any other writer, lands in the
+    # change log so cached copies can be invalidated
+    conn.execute("""
+CREATE TABLE IF NOT EXISTS user_changes(
+                   seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                   user_id INTEGER NOT NULL,
+                   op TEXT NOT NULL,
+                   changed_at REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0)
+                   )
+""")
+    for op, row in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+        conn.execute(f"""
+CREATE TRIGGER IF NOT EXISTS users_{op.lower()}_log AFTER {op} ON users
+BEGIN
+    INSERT INTO user_changes (user_id, op) VALUES ({row}.id, '{op}');
+END
+""")
+    conn.executemany(
+        "INSERT OR IGNORE INTO users (id, name, age) VALUES (?, ?, ?)",
+        [(1, 'Michael', 45), (2, 'Jim', 35), (3, 'Pam', 27)]
+    )
+    conn.commit()
+
+
+def fetch_user(conn, user_id: int):
+    row = conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
+    if row is None:
+        return None
+    return {'id': row['id'], 'name': row['name'], 'age': row['age']}
+
+
+def fetch_users(conn, user_ids):
+    user_ids = list(user_ids)
+    placeholders = ', '.join('?' * len(user_ids))
+    rows = conn.execute(f"SELECT * FROM users WHERE id IN ({placeholders})", user_ids)
+    return [{'id': row['id'], 'name': row['name'], 'age': row['age']} for row in rows]
+
+
+def user_ids(conn):
+    for row in conn.execute("SELECT id FROM users"):
+        yield row['id']
+
+
+def upsert_user(conn, user_id: int, name: str, age: int):
+    conn.execute(
+        "INSERT INTO users (id, name, age) VALUES (?, ?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET name = excluded.name, age = excluded.age",
+        (user_id, name, age)
+    )
+    conn.commit()
+    return {'id': user_id, 'name': name, 'age': age}
+
+
+def delete_user(conn, user_id: int):
+    deleted = conn.execute("DELETE FROM users WHERE id = ?", (user_id,)).rowcount
+    conn.commit()
+    return deleted > 0
+
+
+def changes_since(conn, seq: int, limit: int = 1000):
+    return conn.execute(
+        "SELECT seq, user_id FROM user_changes WHERE seq > ? ORDER BY seq LIMIT ?", (seq, limit)
+    ).fetchall()
+
+
+def prune_changes(conn, seq: int, older_than: float):
+    conn.execute("DELETE FROM user_changes WHERE seq <= ? AND changed_at < ?", (seq, older_than))
+    conn.commit()
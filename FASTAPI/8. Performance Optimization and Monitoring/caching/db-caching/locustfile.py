@@ -0,0 +1,43 @@
+# Mixed valid / unknown id load for db-caching. Prints sqlite queries per
+# second at the end of the run, read from /cache-stats.
+#
+#   uvicorn main:app                                  # after
+#   NEGATIVE_TTL=0 USER_BLOOM_FILTER=0 uvicorn main:app   # before
+#   locust -f locustfile.py --headless -u 200 -r 50 -t 60s --host http://localhost:8000
+import os
+import time
+import random
+import requests
+from locust import HttpUser, task, constant_throughput, events
+
+VALID_IDS = [1, 2, 3]
+INVALID_RATIO = float(os.getenv('INVALID_RATIO', '0.5'))
+
+run = {}
+
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    run['stats'] = requests.get(f'{environment.host}/cache-stats').json()
+    run['start'] = time.time()
+
+
+@events.test_stop.add_listener
+def on_test_stop(environment, **kwargs):
+    stats = requests.get(f'{environment.host}/cache-stats').json()
+    elapsed = time.time() - run['start']
+    for name in ('db_queries', 'bloom_rejections', 'negative_hits'):
+        delta = stats.get(name, 0) - run['stats'].get(name, 0)
+        print(f'{name}: {delta} ({delta / elapsed:.1f}/s)')
+
+
+class UserLookup(HttpUser):
+    wait_time = constant_throughput(10)
+
+    @task
+    def get_user(self):
+        if random.random() < INVALID_RATIO:
+            user_id = random.randint(1000, 10 ** 9)
+        else:
+            user_id = random.choice(VALID_IDS)
+        self.client.post('/get-user', json={'user_id': user_id}, name='/get-user')
@@ -1,70 +1,174 @@
-import sqlite3
+import os
+import sys
 import redis
-import json
-import hashlib
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
-app = FastAPI()
-redis_client = redis.Redis(host='localhost', port=6379, db=0)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
+from perfkit.local_cache import LocalCache, TwoTierCache
+from perfkit.cache_metrics import CacheMetrics
+from perfkit.keys import int_key
+from perfkit.bloom import RedisBloomFilter
+from perfkit.circuit_breaker import CircuitBreaker, ResilientRedis
+from perfkit.warmup import warm_up, hot_keys_from_log
+from perfkit.loop_monitor import LoopLagMiddleware
+from perfkit.server_timing import ServerTimingMiddleware, phase
+from perfkit.http_metrics import http_instrumentator
+from perfkit.tracing import setup_tracing
+from database import db, init_db, fetch_user, fetch_users, upsert_user, delete_user, user_ids
+from changelog import ChangeLogTailer
 
-# establish database connection
-def get_db_connection():
-    conn = sqlite3.connect('db.sqlite3')
-    conn.row_factory = sqlite3.Row
-    return conn
+# if Redis goes away the breaker opens and every lookup goes to sqlite until
+# a probe finds it back
+redis_client = ResilientRedis(
+    redis.Redis(host='localhost', port=6379, db=0, socket_connect_timeout=0.25, socket_timeout=0.5),
+    CircuitBreaker('redis', failure_threshold=5, reset_timeout=5)
+)
 
+# hot user ids are answered from process memory; the short local TTL bounds
+# staleness if an invalidation message is ever missed
+cache = TwoTierCache(redis_client, LocalCache(maxsize=1024, ttl=30), metrics=CacheMetrics('users'))
 
-# set up database
-def init_db():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-CREATE TABLE IF NOT EXISTS users(
-                   id INTEGER PRIMARY KEY,
-                   name TEXT NOT NULL,
-                   age INTEGER
-                   )
-""")
-    cursor.execute("INSERT INTO users (id, name, age) VALUES (1, 'Michael', 45)")
-    cursor.execute("INSERT INTO users (id, name, age) VALUES (2, 'Jim', 35)")
-    cursor.execute("INSERT INTO users (id, name, age) VALUES (3, 'Pam', 27)")
-    conn.commit()
-    conn.close()
+# writes go through the cache and external writers are caught by the change
+# log, so entries can live much longer than the old one hour
+USER_TTL = 24 * 3600
 
-init_db()
+# misses are cached briefly so scanners hitting random ids stop reaching
+# sqlite; 0 turns negative caching off
+NEGATIVE_TTL = int(os.getenv('NEGATIVE_TTL', '60'))
+NOT_FOUND = {'message': 'User not found.'}
+
+# ids that were never inserted are rejected before the DB query
+BLOOM_FILTER_ENABLED = os.getenv('USER_BLOOM_FILTER', '1') == '1'
+bloom = RedisBloomFilter(redis_client, 'users:bloom', capacity=1_000_000, error_rate=0.01)
+
+# the most requested ids in the access log are loaded before the worker
+# takes traffic, so a deploy does not start with a cold cache
+WARMUP_ENABLED = os.getenv('USER_WARMUP', '1') == '1'
+ACCESS_LOG = os.getenv('USER_ACCESS_LOG', 'access.log')
+ACCESS_LOG_PATTERN = os.getenv('USER_ACCESS_LOG_PATTERN', r'user_id["=:\s]+(\d+)')
+WARMUP_TOP_N = int(os.getenv('USER_WARMUP_TOP_N', '1000'))
+WARMUP_CONCURRENCY = int(os.getenv('USER_WARMUP_CONCURRENCY', '4'))
+
+
+async def warm_cache():
+    hot_ids = [int(user_id) for user_id in hot_keys_from_log(ACCESS_LOG, ACCESS_LOG_PATTERN, WARMUP_TOP_N)]
+
+    def load(batch):
+        return [(make_cache_key(user['id']), user) for user in fetch_users(db.connection(), batch)]
+
+    async def build(batch):
+        return await asyncio.to_thread(load, batch)
+
+    async def write(pairs):
+        await asyncio.to_thread(cache.set_many, pairs, USER_TTL)
+
+    return await warm_up('users', hot_ids, build, write, batch_size=200, concurrency=WARMUP_CONCURRENCY)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_db()
+    if BLOOM_FILTER_ENABLED:
+        bloom.fill(user_ids(db.connection()))
+    if WARMUP_ENABLED:
+        await warm_cache()
+    cache.start_listener()
+    tailer.start()
+    yield
+    await tailer.stop()
+    cache.stop_listener()
+    db.close_all()
 
 
 class UserQuery(BaseModel):
     user_id: int
 
 
+class UserIn(BaseModel):
+    name: str
+    age: int
+
+
 def make_cache_key(user_id: int):
-    raw = f"user:{user_id}"
-    return hashlib.sha256(raw.encode()).hexdigest()
+    return int_key('user', user_id)
+
+
+# reload a user some other writer touched, or drop it if it is gone
+def refresh_user(user_id: int):
+    user = fetch_user(db.connection(), user_id)
+    if user is None:
+        cache.invalidate(make_cache_key(user_id))
+    else:
+        if BLOOM_FILTER_ENABLED:
+            bloom.add(user_id)
+        cache.set(make_cache_key(user_id), user, USER_TTL, broadcast=True)
+
+
+def cache_not_found(cache_key: str):
+    if NEGATIVE_TTL > 0:
+        cache.set(cache_key, NOT_FOUND, NEGATIVE_TTL)
+    return NOT_FOUND
+
+
+tailer = ChangeLogTailer(redis_client, on_change=refresh_user)
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(LoopLagMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+
+http_instrumentator().instrument(app).expose(app)
+# TRACING=1 TRACING_EXPORTER=console|file|otlp TRACING_SAMPLE_RATIO=0.1
+setup_tracing(app, 'db-caching')
 
 
 @app.post('/get-user')
 def get_user(query: UserQuery):
     cache_key = make_cache_key(query.user_id)
     
-    cached_data = redis_client.get(cache_key)
+    cached_data = cache.get(cache_key)
     if cached_data:
-        print('Serving from Redis Cache!')
-        return json.loads(cached_data)
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE id = ?", (query.user_id,))
-    row = cursor.fetchone()
-    conn.close()
-
-    if row is None:
-        return {'message': 'User not found.'}
-    
-    result = {'id': row['id'], 'name': row['name'], 'age': row['age']}
-    redis_client.setex(cache_key, 3600, json.dumps(result))
-    print('Fetched from DB and Cached!')
+        if cached_data == NOT_FOUND:
+            cache.incr('negative_hits')
+        return cached_data
+
+    if BLOOM_FILTER_ENABLED and not bloom.might_contain(query.user_id):
+        cache.incr('bloom_rejections')
+        return cache_not_found(cache_key)
+
+    cache.incr('db_queries')
+    with phase('db'):
+        result = fetch_user(db.connection(), query.user_id)
+    if result is None:
+        return cache_not_found(cache_key)
+
+    cache.set(cache_key, result, USER_TTL)
+    return result
+
+
+# write-through: sqlite first, then Redis and every worker's local tier
+@app.put('/users/{user_id}')
+def put_user(user_id: int, user: UserIn):
+    with phase('db'):
+        result = upsert_user(db.connection(), user_id, user.name, user.age)
+    if BLOOM_FILTER_ENABLED:
+        bloom.add(user_id)
+    cache.set(make_cache_key(user_id), result, USER_TTL, broadcast=True)
+    return result
+
+
+@app.delete('/users/{user_id}')
+def remove_user(user_id: int):
+    with phase('db'):
+        deleted = delete_user(db.connection(), user_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail='User Not Found')
+    cache.invalidate(make_cache_key(user_id))
+    return {'detail': 'User Deleted'}
+
 
-    return result
\ No newline at end of file
+@app.get('/cache-stats')
+def cache_stats():
+    return cache.stats()
@@ -0,0 +1,27 @@
+import threading
+import database
+from database import ConnectionManager
+
+
+def test_init_db_is_idempotent(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'db', ConnectionManager(str(tmp_path / 'users.sqlite3')))
+    database.init_db()
+    database.init_db()
+
+    count = database.db.connection().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    assert count == 3
+    database.db.close_all()
+
+
+def test_connection_is_reused_per_thread(tmp_path):
+    manager = ConnectionManager(str(tmp_path / 'users.sqlite3'))
+    assert manager.connection() is manager.connection()
+    assert manager.connection().execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(manager.connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not manager.connection()
+
+    manager.close_all()
@@ -0,0 +1,108 @@
+import sqlite3
+import pytest
+from collections import Counter
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from tests.fakes import FakeRedis, load_main
+
+
+@pytest.fixture
+def main(tmp_path, monkeypatch):
+    main = load_main(__file__)
+    fake = main.ResilientRedis(FakeRedis(), main.CircuitBreaker('test', failure_threshold=2, reset_timeout=60))
+    monkeypatch.setattr(main.cache, 'redis', fake)
+    monkeypatch.setattr(main.bloom, 'redis', fake)
+    monkeypatch.setattr(main.tailer, 'redis', fake)
+    monkeypatch.setattr(main.tailer, 'interval', 3600)
+    monkeypatch.setattr(main.db, 'path', str(tmp_path / 'users.sqlite3'))
+    monkeypatch.setattr(main, 'ACCESS_LOG', str(tmp_path / 'access.log'))
+    monkeypatch.setattr(main.cache, '_stats', Counter())
+    main.cache.local.clear()
+    return main
+
+
+def test_put_writes_through_to_cache(main):
+    with TestClient(main.app) as client:
+        response = client.put('/users/1', json={'name': 'Michael Scott', 'age': 46})
+        assert response.status_code == 200
+
+        assert main.cache.redis.get('user:1') is not None
+        assert client.post('/get-user', json={'user_id': 1}).json() == {
+            'id': 1, 'name': 'Michael Scott', 'age': 46
+        }
+        assert main.cache.stats()['redis_misses'] == 0
+
+
+def test_delete_invalidates_cache(main):
+    with TestClient(main.app) as client:
+        client.post('/get-user', json={'user_id': 2})
+        assert client.delete('/users/2').status_code == 200
+        assert main.cache.redis.get('user:2') is None
+        assert client.post('/get-user', json={'user_id': 2}).json() == {'message': 'User not found.'}
+        assert client.delete('/users/2').status_code == 404
+
+
+def test_external_writes_are_picked_up_from_change_log(main):
+    with TestClient(main.app) as client:
+        assert client.post('/get-user', json={'user_id': 3}).json()['name'] == 'Pam'
+
+        # another process updates sqlite directly, bypassing the API
+        conn = sqlite3.connect(main.db.path)
+        conn.execute("UPDATE users SET name = 'Pam Halpert' WHERE id = 3")
+        conn.commit()
+        conn.close()
+
+        assert main.tailer.poll_once() > 0
+        assert client.post('/get-user', json={'user_id': 3}).json()['name'] == 'Pam Halpert'
+
+
+def test_unknown_ids_are_rejected_by_bloom_filter(main):
+    with TestClient(main.app) as client:
+        for _ in range(3):
+            assert client.post('/get-user', json={'user_id': 999}).json() == {'message': 'User not found.'}
+
+        stats = client.get('/cache-stats').json()
+        assert stats['bloom_rejections'] == 1
+        assert stats['negative_hits'] == 2
+        assert stats.get('db_queries', 0) == 0
+
+
+def test_missing_ids_are_negatively_cached(main, monkeypatch):
+    monkeypatch.setattr(main, 'BLOOM_FILTER_ENABLED', False)
+    with TestClient(main.app) as client:
+        for _ in range(3):
+            client.post('/get-user', json={'user_id': 999})
+        assert client.get('/cache-stats').json()['db_queries'] == 1
+
+        # creating the user replaces the negative entry
+        client.put('/users/999', json={'name': 'Toby', 'age': 40})
+        assert client.post('/get-user', json={'user_id': 999}).json()['name'] == 'Toby'
+
+
+def test_hot_users_from_access_log_are_warmed_on_startup(main):
+    with open(main.ACCESS_LOG, 'w') as f:
+        f.write('POST /get-user {"user_id": 3}\n' * 5)
+        f.write('POST /get-user {"user_id": 1}\n' * 2)
+        f.write('POST /get-user {"user_id": 404}\n')
+
+    with TestClient(main.app) as client:
+        assert main.cache.redis.get('user:3') is not None
+        assert main.cache.redis.get('user:1') is not None
+        assert REGISTRY.get_sample_value('cache_warmup_progress_ratio', {'namespace': 'users'}) == 1
+
+        assert client.post('/get-user', json={'user_id': 3}).json()['name'] == 'Pam'
+        assert client.get('/cache-stats').json().get('db_queries', 0) == 0
+
+
+def test_requests_are_served_from_sqlite_while_redis_is_down(main):
+    main.cache.redis.client.down = True
+    with TestClient(main.app) as client:
+        for _ in range(5):
+            assert client.post('/get-user', json={'user_id': 1}).json()['name'] == 'Michael'
+        assert client.put('/users/2', json={'name': 'Dwight', 'age': 40}).status_code == 200
+        assert client.post('/get-user', json={'user_id': 2}).json()['name'] == 'Dwight'
+
+    # one failed subscribe at startup, then the breaker opened after two
+    # failed commands and everything after that skipped Redis
+    assert main.cache.redis.breaker.state == 'open'
+    assert main.cache.redis.client.calls == 3
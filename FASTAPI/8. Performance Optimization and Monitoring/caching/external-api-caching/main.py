@@ -1,12 +1,45 @@
-import redis
-import json
-import hashlib
+import os
+import sys
 import httpx
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends
 from pydantic import BaseModel
 
-app = FastAPI()
-redis_client = redis.Redis(host='localhost', port=6379, db=0)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from perfkit.singleflight import RedisSingleFlight
+from perfkit.swr import SWRCache
+from perfkit.cache_metrics import CacheMetrics
+from perfkit.http_client import http_client_lifespan, get_http_client, record_pool_stats
+from perfkit.redis_pool import get_redis, close_redis
+from perfkit.keys import int_key
+from perfkit.loop_monitor import LoopLagMiddleware
+from perfkit.server_timing import ServerTimingMiddleware
+from perfkit.http_metrics import http_instrumentator
+from perfkit.tracing import setup_tracing
+
+UPSTREAM_URL = os.getenv('UPSTREAM_URL', 'https://jsonplaceholder.typicode.com')
+
+# 'local' coalesces misses inside one worker, 'redis' across all workers
+SINGLEFLIGHT_BACKEND = os.getenv('SINGLEFLIGHT_BACKEND', 'local')
+
+
+# one pooled client for the whole app so upstream connections are reused
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with http_client_lifespan(app):
+        yield
+    await close_redis()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(LoopLagMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+redis_client = get_redis()
+
+http_instrumentator().instrument(app).expose(app)
+# TRACING=1 TRACING_EXPORTER=console|file|otlp TRACING_SAMPLE_RATIO=0.1
+setup_tracing(app, 'external-api-caching')
 
 
 class PostRequest(BaseModel):
@@ -14,26 +47,34 @@ class PostRequest(BaseModel):
 
 
 def make_cache_key(post_id: int):
-    raw = f"external_api:post_{post_id}"
-    return hashlib.sha256(raw.encode()).hexdigest()
+    return int_key('external_api:post', post_id)
+
+
+# posts are fresh for 10 minutes and may be served stale for another 50
+# while a background task refreshes them
+cache = SWRCache(redis_client, metrics=CacheMetrics('posts'))
+if SINGLEFLIGHT_BACKEND == 'redis':
+    cache.flight = RedisSingleFlight(redis_client, load=cache.peek)
+
+
+@cache.cached(key=lambda client, post_id: make_cache_key(post_id), soft_ttl=600, hard_ttl=3600)
+async def fetch_post(client: httpx.AsyncClient, post_id: int):
+    response = await client.get(f"{UPSTREAM_URL}/posts/{post_id}")
+    if response.status_code != 200:
+        return None
+    return response.json()
 
 
 @app.post('/get-post')
-async def get_post(data: PostRequest):
-    cache_key = make_cache_key(data.post_id)
-
-    cached_data = redis_client.get(cache_key)
-    if cached_data:
-        print('Served from Redis cache!')
-        return json.loads(cached_data)
-    
-    print('Calling external API...')
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"https://jsonplaceholder.typicode.com/posts/{data.post_id}")
-        if response.status_code != 200:
-            return {'error': 'Post not found!'}
-        
-    post_data = response.json()
-    redis_client.setex(cache_key, 600, json.dumps(post_data))
-    print('Fetched and stored in Cache!')
-    return post_data
\ No newline at end of file
+async def get_post(data: PostRequest, client: httpx.AsyncClient = Depends(get_http_client)):
+    # concurrent misses for the same post share a single upstream call
+    post_data = await fetch_post(client, data.post_id)
+    if post_data is None:
+        return {'error': 'Post not found!'}
+    return post_data
+
+
+# also exported on /metrics as http_client_pool_*
+@app.get('/http-pool-stats')
+def http_pool_stats(client: httpx.AsyncClient = Depends(get_http_client)):
+    return record_pool_stats(client)
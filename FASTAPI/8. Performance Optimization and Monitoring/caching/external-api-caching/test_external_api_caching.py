@@ -0,0 +1,83 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from tests.fakes import FakeAsyncRedis, load_main
+
+
+class StubUpstream(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    calls = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with StubUpstream.lock:
+            StubUpstream.calls += 1
+        # slow enough that every concurrent request misses while it runs
+        time.sleep(0.2)
+        post_id = int(self.path.rsplit('/', 1)[-1])
+        body = json.dumps({'id': post_id, 'title': 'stub'}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubUpstream)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    StubUpstream.calls = 0
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+
+
+@pytest.fixture
+def main(upstream, monkeypatch):
+    main = load_main(__file__)
+    monkeypatch.setattr(main, 'UPSTREAM_URL', upstream)
+    monkeypatch.setattr(main.cache, 'redis', FakeAsyncRedis())
+    return main
+
+
+def test_concurrent_misses_make_one_upstream_call(main):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with main.app.router.lifespan_context(main.app):
+            async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+                return await asyncio.gather(*(
+                    client.post('/get-post', json={'post_id': 1}) for _ in range(20)
+                ))
+
+    responses = asyncio.run(run())
+
+    assert StubUpstream.calls == 1
+    assert all(r.status_code == 200 for r in responses)
+    assert all(r.json() == {'id': 1, 'title': 'stub'} for r in responses)
+
+
+def test_upstream_connection_is_reused(main):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with main.app.router.lifespan_context(main.app):
+            async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+                for post_id in (1, 2, 3):
+                    await client.post('/get-post', json={'post_id': post_id})
+                return (await client.get('/http-pool-stats')).json()
+
+    stats = asyncio.run(run())
+
+    assert StubUpstream.calls == 3
+    assert stats['open_connections'] == 1
+    assert stats['idle_connections'] == 1
+    assert stats['requests_waiting_for_connection'] == 0
@@ -1,14 +1,101 @@
-import redis
-import json
-import hashlib
+import os
+import sys
+import csv
+import time
 import joblib
+import itertools
+import numpy as np
+from typing import List
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from sklearn.datasets import load_iris
 
-app = FastAPI()
-redis_client = redis.Redis(host='localhost', port=6379, db=0)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
-model = joblib.load('model.joblib')
+from perfkit.redis_pool import get_redis, close_redis, mget, setex_many
+from perfkit.swr import SWRCache
+from perfkit.cache_metrics import CacheMetrics
+from perfkit.keys import FloatVectorKey
+from perfkit.warmup import warm_up
+from perfkit.loop_monitor import LoopLagMiddleware
+from perfkit.server_timing import ServerTimingMiddleware
+from perfkit.http_metrics import http_instrumentator
+from perfkit.tracing import setup_tracing
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP_ENABLED:
+        await warm_cache()
+    yield
+    await close_redis()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(LoopLagMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+redis_client = get_redis()
+cache = SWRCache(redis_client, metrics=CacheMetrics('predictions'))
+
+http_instrumentator().instrument(app).expose(app)
+# TRACING=1 TRACING_EXPORTER=console|file|otlp TRACING_SAMPLE_RATIO=0.1
+setup_tracing(app, 'ml-caching')
+
+model = joblib.load(os.path.join(os.path.dirname(__file__), 'model.joblib'))
+
+SOFT_TTL = 3000
+HARD_TTL = 3600
+MAX_BATCH_SIZE = 1000
+
+iris_key = FloatVectorKey('predict', 4)
+
+# common inputs are predicted and cached before the worker takes traffic:
+# the rows of a CSV file if given, otherwise the Iris dataset itself plus a
+# grid over its ranges (step 0 turns the grid off)
+WARMUP_ENABLED = os.getenv('PREDICT_WARMUP', '1') == '1'
+WARMUP_FILE = os.getenv('PREDICT_WARMUP_FILE')
+WARMUP_GRID_STEP = float(os.getenv('PREDICT_WARMUP_GRID_STEP', '0.5'))
+WARMUP_CONCURRENCY = int(os.getenv('PREDICT_WARMUP_CONCURRENCY', '4'))
+WARMUP_LOCK_TTL = 60
+
+
+def hot_inputs():
+    if WARMUP_FILE:
+        with open(WARMUP_FILE) as f:
+            return [[float(value) for value in row[:4]] for row in csv.reader(f) if row]
+
+    data = load_iris().data
+    inputs = {tuple(row) for row in data.tolist()}
+    if WARMUP_GRID_STEP > 0:
+        axes = [
+            np.arange(np.floor(low), high + WARMUP_GRID_STEP, WARMUP_GRID_STEP)
+            for low, high in zip(data.min(axis=0), data.max(axis=0))
+        ]
+        # rounded so grid points hash like the same numbers sent as JSON
+        inputs.update(tuple(round(float(v), 1) for v in point) for point in itertools.product(*axes))
+    return [list(row) for row in inputs]
+
+
+async def warm_cache():
+    # every worker shares Redis, so one warm-up per deploy is enough
+    if not await redis_client.set('warmup:predictions', 1, nx=True, ex=WARMUP_LOCK_TTL):
+        return 0
+
+    async def build(batch):
+        start = time.perf_counter()
+        predictions = model.predict(np.array(batch, dtype=np.float64))
+        delta = (time.perf_counter() - start) / len(batch)
+        return [
+            (iris_key(row), cache.encode({'prediction': int(prediction)}, delta, SOFT_TTL))
+            for row, prediction in zip(batch, predictions)
+        ]
+
+    async def write(pairs):
+        with cache.metrics.timed('set_many'):
+            await setex_many(redis_client, pairs, HARD_TTL)
+
+    return await warm_up('predictions', hot_inputs(), build, write, concurrency=WARMUP_CONCURRENCY)
 
 
 class IrisFlower(BaseModel):
@@ -26,20 +113,56 @@ class IrisFlower(BaseModel):
         ]
     
     def cache_key(self):
-        raw = json.dumps(self.model_dump(), sort_keys=True)
-        return f"Predict: {hashlib.sha256(raw.encode()).hexdigest()}"
+        return iris_key(self.to_list())
     
 
+class IrisBatch(BaseModel):
+    flowers: List[IrisFlower] = Field(..., max_length=MAX_BATCH_SIZE)
+
+
+@cache.cached(key=lambda data: data.cache_key(), soft_ttl=SOFT_TTL, hard_ttl=HARD_TTL)
+async def predict_flower(data: IrisFlower):
+    prediction = model.predict([data.to_list()])[0]
+    return {'prediction': int(prediction)}
+
+
 @app.post('/predict')
 async def predict(data: IrisFlower):
-    key = data.cache_key()
+    return await predict_flower(data)
 
-    cached_result = redis_client.get(key)
-    if cached_result:
-        print('Serving prediction from Cache!')
-        return json.loads(cached_result)
-    
-    prediction = model.predict([data.to_list()])[0]
-    result = {'prediction': int(prediction)}
-    redis_client.set(key, json.dumps(result), ex=3600)
-    return result
\ No newline at end of file
+
+# one MGET for every key, one predict call for the missed rows and one
+# pipelined write-back, instead of a get/predict/set per flower
+@app.post('/predict/batch')
+async def predict_batch(batch: IrisBatch):
+    keys = [flower.cache_key() for flower in batch.flowers]
+    unique_keys = list(dict.fromkeys(keys))
+
+    with cache.metrics.timed('mget') as outcome:
+        cached = await mget(redis_client, unique_keys)
+
+    results = {}
+    for key, raw in zip(unique_keys, cached):
+        entry = cache.decode(raw)
+        if entry is not None:
+            cache.metrics.payload('get', raw)
+            results[key] = entry['v']
+    if not outcome.bypassed:
+        cache.metrics.hit(count=len(results))
+        cache.metrics.miss(count=len(unique_keys) - len(results))
+
+    missed = {key: flower for key, flower in zip(keys, batch.flowers) if key not in results}
+    if missed:
+        start = time.perf_counter()
+        matrix = np.array([flower.to_list() for flower in missed.values()], dtype=np.float64)
+        predictions = model.predict(matrix)
+        delta = (time.perf_counter() - start) / len(missed)
+
+        writes = []
+        for key, prediction in zip(missed, predictions):
+            results[key] = {'prediction': int(prediction)}
+            writes.append((key, cache.encode(results[key], delta, SOFT_TTL)))
+        with cache.metrics.timed('set_many'):
+            await setex_many(redis_client, writes, HARD_TTL)
+
+    return {'predictions': [results[key] for key in keys]}
@@ -0,0 +1,69 @@
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from tests.fakes import FakeAsyncRedis, load_main
+
+
+def flower(sepal_length):
+    return {
+        'SepalLengthCm': sepal_length,
+        'SepalWidthCm': 3.0,
+        'PetalLengthCm': 4.5,
+        'PetalWidthCm': 1.5
+    }
+
+
+@pytest.fixture
+def main(monkeypatch):
+    main = load_main(__file__)
+    fake = FakeAsyncRedis()
+    monkeypatch.setattr(main, 'redis_client', fake)
+    monkeypatch.setattr(main.cache, 'redis', fake)
+    return main
+
+
+def test_batch_predicts_missed_rows_in_one_call(main):
+    client = TestClient(main.app)
+    response = client.post('/predict', json=flower(5.0))
+    assert response.status_code == 200
+    main.redis_client.calls = 0
+
+    rows = [flower(5.0), flower(6.0), flower(7.0), flower(6.0)]
+    with patch.object(main.model, 'predict', wraps=main.model.predict) as mock_predict:
+        response = client.post('/predict/batch', json={'flowers': rows})
+
+    assert response.status_code == 200
+    predictions = response.json()['predictions']
+    assert len(predictions) == 4
+    assert predictions[1] == predictions[3]
+
+    # only the two distinct uncached rows reach the model, as one matrix
+    mock_predict.assert_called_once()
+    assert mock_predict.call_args.args[0].shape == (2, 4)
+    # one MGET plus one pipelined write-back
+    assert main.redis_client.calls == 2
+
+
+def test_batch_is_served_from_cache_on_repeat(main):
+    client = TestClient(main.app)
+    rows = [flower(5.0), flower(6.0)]
+    first = client.post('/predict/batch', json={'flowers': rows}).json()
+
+    with patch.object(main.model, 'predict') as mock_predict:
+        second = client.post('/predict/batch', json={'flowers': rows}).json()
+
+    mock_predict.assert_not_called()
+    assert first == second
+
+
+def test_common_inputs_are_warmed_on_startup(main, monkeypatch):
+    monkeypatch.setattr(main, 'WARMUP_GRID_STEP', 0)
+    with TestClient(main.app) as client:
+        # the 150 Iris rows are all cached, written in pipelined batches
+        assert len(main.redis_client.data) > 140
+        with patch.object(main.model, 'predict') as mock_predict:
+            response = client.post('/predict', json={
+                'SepalLengthCm': 5.1, 'SepalWidthCm': 3.5, 'PetalLengthCm': 1.4, 'PetalWidthCm': 0.2
+            })
+        assert response.status_code == 200
+        mock_predict.assert_not_called()
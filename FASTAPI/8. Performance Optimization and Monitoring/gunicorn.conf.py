@@ -0,0 +1,26 @@
+import os
+import sys
+import tempfile
+
+# Several uvicorn workers under gunicorn, with Prometheus metrics shared
+# between them:
+#   gunicorn -c gunicorn.conf.py main:app
+# The directory has to be in the environment before prometheus_client is
+# imported anywhere, workers included, so it is set here in the master.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'prometheus_multiproc'))
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from perfkit.multiprocess import prepare_multiproc_dir, mark_process_dead
+
+bind = os.getenv('BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', str(os.cpu_count() or 1)))
+worker_class = 'uvicorn_worker.UvicornWorker'
+
+
+def on_starting(server):
+    prepare_multiproc_dir()
+
+
+def child_exit(server, worker):
+    mark_process_dead(worker.pid)
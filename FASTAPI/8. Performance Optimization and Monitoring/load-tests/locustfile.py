@@ -0,0 +1,156 @@
+# User classes for every FastAPI service in the course, one per service so
+# each can be driven to saturation on its own (see run.py):
+#
+#   LOAD_PROFILE=step locust -f locustfile.py --headless CrudUser
+import os
+import random
+from locust import HttpUser, LoadTestShape, task, constant_throughput
+from profiles import PROFILES, users_at
+
+USER_RPS = float(os.getenv('USER_RPS', '1'))
+LOAD_PROFILE = os.getenv('LOAD_PROFILE', 'step')
+SPAWN_RATE = float(os.getenv('SPAWN_RATE', '50'))
+
+# same payloads on every run
+random.seed(int(os.getenv('LOAD_SEED', '42')))
+
+HOUSE = {
+    'longitude': -122.23,
+    'latitude': 37.88,
+    'housing_median_age': 41,
+    'total_rooms': 880,
+    'total_bedrooms': 129,
+    'population': 322,
+    'households': 126,
+    'median_income': 8.3252
+}
+
+
+def iris_flower():
+    return {
+        'SepalLengthCm': round(random.uniform(4.3, 7.9), 1),
+        'SepalWidthCm': round(random.uniform(2.0, 4.4), 1),
+        'PetalLengthCm': round(random.uniform(1.0, 6.9), 1),
+        'PetalWidthCm': round(random.uniform(0.1, 2.5), 1)
+    }
+
+
+class ServiceUser(HttpUser):
+    abstract = True
+    wait_time = constant_throughput(USER_RPS)
+
+
+# 4. Database Integration/crud-app
+class CrudUser(ServiceUser):
+    host = os.getenv('CRUD_APP_HOST', 'http://localhost:8001')
+
+    def on_start(self):
+        email = f'load-{random.getrandbits(48):x}@example.com'
+        response = self.client.post('/employees', json={'name': 'Load Test', 'email': email})
+        self.emp_id = response.json()['id'] if response.ok else None
+        self.email = email
+
+    def on_stop(self):
+        if self.emp_id is not None:
+            self.client.delete(f'/employees/{self.emp_id}', name='/employees/{emp_id}')
+
+    @task(5)
+    def get_employee(self):
+        if self.emp_id is not None:
+            self.client.get(f'/employees/{self.emp_id}', name='/employees/{emp_id}')
+
+    @task(2)
+    def list_employees(self):
+        self.client.get('/employees')
+
+    @task(1)
+    def update_employee(self):
+        if self.emp_id is not None:
+            self.client.put(
+                f'/employees/{self.emp_id}',
+                json={'name': f'Load Test {random.randint(1, 1000)}', 'email': self.email},
+                name='/employees/{emp_id}'
+            )
+
+
+# 5. Machine Learning Integration/ml-model
+class MLModelUser(ServiceUser):
+    host = os.getenv('ML_MODEL_HOST', 'http://localhost:8002')
+
+    @task
+    def predict(self):
+        self.client.post('/prediction', json=HOUSE)
+
+
+class MLModelBatchUser(ServiceUser):
+    host = os.getenv('ML_MODEL_HOST', 'http://localhost:8002')
+    batch_size = int(os.getenv('ML_BATCH_SIZE', '50'))
+
+    @task
+    def batch_predict(self):
+        self.client.post('/batch_prediction', json=[HOUSE] * self.batch_size)
+
+
+# 8. Performance Optimization and Monitoring/caching/*
+class DBCachingUser(ServiceUser):
+    host = os.getenv('DB_CACHING_HOST', 'http://localhost:8003')
+    invalid_ratio = float(os.getenv('INVALID_RATIO', '0.2'))
+
+    @task
+    def get_user(self):
+        if random.random() < self.invalid_ratio:
+            user_id = random.randint(1000, 10 ** 9)
+        else:
+            user_id = random.choice([1, 2, 3])
+        self.client.post('/get-user', json={'user_id': user_id}, name='/get-user')
+
+
+class ExternalAPICachingUser(ServiceUser):
+    host = os.getenv('EXTERNAL_API_CACHING_HOST', 'http://localhost:8004')
+
+    @task
+    def get_post(self):
+        self.client.post('/get-post', json={'post_id': random.randint(1, 100)})
+
+
+class MLCachingUser(ServiceUser):
+    host = os.getenv('ML_CACHING_HOST', 'http://localhost:8005')
+
+    @task(4)
+    def predict(self):
+        self.client.post('/predict', json=iris_flower())
+
+    @task(1)
+    def predict_batch(self):
+        self.client.post('/predict/batch', json={'flowers': [iris_flower() for _ in range(100)]})
+
+
+# 6. Advanced FastAPI Concepts/jwt-authentication
+class JWTUser(ServiceUser):
+    host = os.getenv('JWT_HOST', 'http://localhost:8006')
+
+    def on_start(self):
+        self.login()
+
+    # bcrypt makes the login the expensive call, so it gets its own weight
+    @task(1)
+    def login(self):
+        response = self.client.post('/token', data={'username': 'johndoe', 'password': 'secret123'})
+        if response.ok:
+            self.client.headers['Authorization'] = f'Bearer {response.json()["access_token"]}'
+
+    @task(10)
+    def read_users(self):
+        self.client.get('/users')
+
+
+class StepLoad(LoadTestShape):
+    def tick(self):
+        users = users_at(LOAD_PROFILE, self.get_run_time())
+        if users is None:
+            return None
+        return users, SPAWN_RATE
+
+
+if LOAD_PROFILE not in PROFILES:
+    raise SystemExit(f'Unknown LOAD_PROFILE {LOAD_PROFILE!r}, pick one of {", ".join(PROFILES)}')
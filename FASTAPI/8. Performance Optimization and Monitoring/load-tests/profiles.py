@@ -0,0 +1,23 @@
+# Scripted load profiles: (seconds, users) steps run one after the other.
+# Every user is paced with constant_throughput(USER_RPS), so a step offers
+# users * USER_RPS requests per second no matter how fast the server is;
+# the step where achieved rps stops tracking offered rps is saturation.
+PROFILES = {
+    'smoke': [(30, 5)],
+    'step': [(60, 10), (60, 25), (60, 50), (60, 100), (60, 200), (60, 400)],
+    'soak': [(30, 10), (600, 100)],
+    'spike': [(60, 20), (30, 400), (60, 20)],
+}
+
+
+def total_duration(profile: str):
+    return sum(seconds for seconds, _ in PROFILES[profile])
+
+
+def users_at(profile: str, run_time: float):
+    elapsed = 0
+    for seconds, users in PROFILES[profile]:
+        elapsed += seconds
+        if run_time < elapsed:
+            return users
+    return None
@@ -0,0 +1,94 @@
+import csv
+import json
+import statistics
+
+METRICS = ('rps', 'p50', 'p95', 'p99', 'error_rate')
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _row_summary(row, rps_column: str):
+    requests = _float(row.get('Request Count', row.get('Total Request Count')))
+    failures = _float(row.get('Failure Count', row.get('Total Failure Count')))
+    return {
+        'rps': _float(row[rps_column]),
+        'p50': _float(row['50%']),
+        'p95': _float(row['95%']),
+        'p99': _float(row['99%']),
+        'error_rate': failures / requests if requests else 0.0
+    }
+
+
+# {endpoint name: metrics} from locust's <prefix>_stats.csv, including the
+# 'Aggregated' row
+def summarize_stats(path: str):
+    with open(path, newline='') as f:
+        return {
+            row['Name']: _row_summary(row, 'Requests/s')
+            for row in csv.DictReader(f)
+        }
+
+
+# one entry per load step from <prefix>_stats_history.csv: median of the
+# per-second aggregated rows while that many users were running
+def summarize_steps(path: str):
+    steps = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            if row['Name'] != 'Aggregated' or _float(row['User Count']) == 0:
+                continue
+            steps.setdefault(int(_float(row['User Count'])), []).append(row)
+
+    summary = []
+    for users, rows in steps.items():
+        rps = [_float(row['Requests/s']) for row in rows]
+        failures = [_float(row['Failures/s']) for row in rows]
+        summary.append({
+            'users': users,
+            'rps': statistics.median(rps),
+            'p50': statistics.median(_float(row['50%']) for row in rows),
+            'p95': statistics.median(_float(row['95%']) for row in rows),
+            'p99': statistics.median(_float(row['99%']) for row in rows),
+            'error_rate': sum(failures) / sum(rps) if sum(rps) else 0.0
+        })
+    return summary
+
+
+# A metric regresses when throughput drops or latency grows by more than
+# `tolerance` (relative), or the error rate rises by more than
+# `error_tolerance` (absolute). Endpoints missing from the baseline are new
+# and are not compared.
+def compare(summary: dict, baseline: dict, tolerance: float = 0.1, error_tolerance: float = 0.01):
+    regressions = []
+    for service, endpoints in summary.items():
+        for endpoint, current in endpoints.items():
+            previous = baseline.get(service, {}).get(endpoint)
+            if previous is None:
+                continue
+            if current['rps'] < previous['rps'] * (1 - tolerance):
+                regressions.append((service, endpoint, 'rps', previous['rps'], current['rps']))
+            for metric in ('p50', 'p95', 'p99'):
+                if current[metric] > previous[metric] * (1 + tolerance):
+                    regressions.append((service, endpoint, metric, previous[metric], current[metric]))
+            if current['error_rate'] > previous['error_rate'] + error_tolerance:
+                regressions.append((service, endpoint, 'error_rate', previous['error_rate'], current['error_rate']))
+    return regressions
+
+
+def write_json(path: str, data):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def write_csv(path: str, summary: dict):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(('service', 'endpoint') + METRICS)
+        for service, endpoints in summary.items():
+            for endpoint, metrics in endpoints.items():
+                writer.writerow((service, endpoint) + tuple(round(metrics[m], 4) for m in METRICS))
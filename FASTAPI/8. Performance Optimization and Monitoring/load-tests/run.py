@@ -0,0 +1,80 @@
+# Headless benchmark harness. Start the services on the ports expected by
+# locustfile.py (or point the *_HOST variables elsewhere), then:
+#
+#   python run.py --profile step                         # every service
+#   python run.py --profile smoke CrudUser JWTUser       # a subset
+#   python run.py --profile step --update-baseline       # accept as baseline
+#
+# Each user class runs alone under the same step profile. Results go to
+# results/<timestamp>/: locust's own CSVs, summary.json/csv (whole run,
+# per endpoint) and steps.json (per load step). The exit code is 1 when
+# any metric regressed against baseline-<profile>.json.
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from report import summarize_stats, summarize_steps, compare, write_json, write_csv
+from profiles import PROFILES, total_duration
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SERVICES = (
+    'CrudUser', 'MLModelUser', 'MLModelBatchUser', 'DBCachingUser',
+    'ExternalAPICachingUser', 'MLCachingUser', 'JWTUser'
+)
+
+
+def run_locust(service: str, profile: str, prefix: str):
+    env = {**os.environ, 'LOAD_PROFILE': profile}
+    command = [
+        sys.executable, '-m', 'locust', '-f', os.path.join(HERE, 'locustfile.py'),
+        '--headless', '--only-summary', '--csv', prefix, '--csv-full-history',
+        '--run-time', f'{total_duration(profile) + 5}s', service
+    ]
+    print(f'== {service} ({profile}, {total_duration(profile)}s)', flush=True)
+    subprocess.run(command, env=env, check=False)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('services', nargs='*', default=SERVICES)
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='step')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    out = os.path.join(HERE, 'results', time.strftime('%Y%m%d-%H%M%S'))
+    os.makedirs(out, exist_ok=True)
+
+    summary, steps = {}, {}
+    for service in args.services:
+        prefix = os.path.join(out, service)
+        run_locust(service, args.profile, prefix)
+        summary[service] = summarize_stats(f'{prefix}_stats.csv')
+        steps[service] = summarize_steps(f'{prefix}_stats_history.csv')
+
+    write_json(os.path.join(out, 'summary.json'), summary)
+    write_json(os.path.join(out, 'steps.json'), steps)
+    write_csv(os.path.join(out, 'summary.csv'), summary)
+    print(f'Results in {out}')
+
+    baseline_path = os.path.join(HERE, f'baseline-{args.profile}.json')
+    if args.update_baseline:
+        write_json(baseline_path, summary)
+        print(f'Baseline updated: {baseline_path}')
+        return 0
+    if not os.path.exists(baseline_path):
+        print('No baseline yet, rerun with --update-baseline to store this run')
+        return 0
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = compare(summary, baseline, args.tolerance)
+    for service, endpoint, metric, before, after in regressions:
+        print(f'REGRESSION {service} {endpoint} {metric}: {before:.4f} -> {after:.4f}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+from report import summarize_stats, summarize_steps, compare, write_csv
+
+STATS = '''Type,Name,Request Count,Failure Count,Median Response Time,Average Response Time,Min Response Time,Max Response Time,Average Content Size,Requests/s,Failures/s,50%,66%,75%,80%,90%,95%,98%,99%,99.9%,99.99%,100%
+POST,/get-user,1000,10,4,5,1,90,40,50.0,0.5,4,5,6,7,9,12,20,30,80,90,90
+,Aggregated,1000,10,4,5,1,90,40,50.0,0.5,4,5,6,7,9,12,20,30,80,90,90
+'''
+
+HISTORY = '''Timestamp,User Count,Type,Name,Requests/s,Failures/s,50%,66%,75%,80%,90%,95%,98%,99%,99.9%,99.99%,100%,Total Request Count,Total Failure Count
+1,0,,Aggregated,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0
+2,10,,Aggregated,9,0,4,4,4,4,5,6,7,8,9,9,9,9,0
+3,10,,Aggregated,10,0,4,4,4,4,5,6,7,8,9,9,9,19,0
+4,50,,Aggregated,30,3,40,45,50,55,60,80,90,120,130,130,130,49,3
+4,50,POST,/get-user,30,3,40,45,50,55,60,80,90,120,130,130,130,49,3
+'''
+
+
+def test_stats_and_steps_are_summarized(tmp_path):
+    stats = tmp_path / 'x_stats.csv'
+    stats.write_text(STATS)
+    history = tmp_path / 'x_stats_history.csv'
+    history.write_text(HISTORY)
+
+    summary = summarize_stats(str(stats))
+    assert summary['/get-user'] == {'rps': 50.0, 'p50': 4.0, 'p95': 12.0, 'p99': 30.0, 'error_rate': 0.01}
+
+    steps = summarize_steps(str(history))
+    assert [step['users'] for step in steps] == [10, 50]
+    assert steps[0]['rps'] == 9.5
+    assert steps[1]['p99'] == 120
+    assert steps[1]['error_rate'] == 0.1
+
+    write_csv(str(tmp_path / 'summary.csv'), {'DBCachingUser': summary})
+    assert (tmp_path / 'summary.csv').read_text().splitlines()[1].startswith('DBCachingUser,/get-user,50.0')
+
+
+def test_regressions_are_reported_beyond_tolerance():
+    baseline = {'svc': {'/a': {'rps': 100, 'p50': 10, 'p95': 20, 'p99': 30, 'error_rate': 0.0}}}
+    same = {'svc': {'/a': {'rps': 95, 'p50': 10.5, 'p95': 21, 'p99': 32, 'error_rate': 0.005}}}
+    worse = {'svc': {
+        '/a': {'rps': 80, 'p50': 10, 'p95': 20, 'p99': 45, 'error_rate': 0.05},
+        '/new': {'rps': 1, 'p50': 999, 'p95': 999, 'p99': 999, 'error_rate': 1.0}
+    }}
+
+    assert compare(same, baseline) == []
+    assert [metric for _, _, metric, _, _ in compare(worse, baseline)] == ['rps', 'p99', 'error_rate']
@@ -1,9 +1,13 @@
 import json
-from locust import HttpUser, task, between
+from locust import HttpUser, task, constant_throughput
+
+# Intro example for locust-demo/main.py. The benchmark suite for the real
+# services, with step-load profiles and baselines, is in ../load-tests.
 
 
 class APIUser(HttpUser):
-    wait_time = between(1, 2)
+    # a fixed request rate per user, so offered load is users * 1 rps
+    wait_time = constant_throughput(1)
 
     @task
     def call_predict(self):
@@ -1,7 +1,14 @@
+import os
+import sys
 from fastapi import FastAPI
 from pydantic import BaseModel
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from perfkit.loop_monitor import LoopLagMiddleware
+
 app = FastAPI()
+app.add_middleware(LoopLagMiddleware)
 
 
 class InputData(BaseModel):
@@ -0,0 +1,18 @@
+import os
+import hmac
+from fastapi import Header, HTTPException
+
+# shared secret for the debug and profiling endpoints; they stay closed
+# (403) while it is unset, since they run code under a profiler and hand
+# out stacks, file paths and source lines
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+
+def valid_admin_token(token: str):
+    return bool(ADMIN_TOKEN) and hmac.compare_digest((token or '').encode(), ADMIN_TOKEN.encode())
+
+
+# dependency for routers: APIRouter(dependencies=[Depends(check_admin_token)])
+def check_admin_token(x_admin_token: str = Header(None)):
+    if not valid_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail='Unauthorized')
@@ -0,0 +1,69 @@
+import math
+import hashlib
+
+
+# Bloom filter kept as a Redis bitmap so every worker shares it. A "no" is
+# certain, a "yes" may be a false positive at roughly error_rate. Items can
+# be added but never removed.
+#
+# A "no" is only trusted once fill() has loaded the full set and left the
+# filled marker. If Redis loses the bitmap, a later add() would otherwise
+# recreate it holding just that one item and reject every other real id.
+class RedisBloomFilter:
+    def __init__(self, redis_client, key: str, capacity: int = 1_000_000, error_rate: float = 0.01):
+        self.redis = redis_client
+        self.key = key
+        self.filled_key = f'{key}:filled'
+        self.size = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+
+    # double hashing: k positions from one 128-bit digest
+    def _positions(self, item):
+        digest = hashlib.blake2b(str(item).encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    # an add that did not reach Redis drops the marker, so the filter answers
+    # "maybe" until the next fill instead of rejecting the new item
+    def add(self, item):
+        if not self.add_many([item]):
+            self.redis.delete(self.filled_key)
+
+    # False if any chunk was not written: a bypassed pipeline returns no
+    # results for its queued commands
+    def add_many(self, items, chunk_size: int = 10000):
+        pipe = self.redis.pipeline(transaction=False)
+        written = True
+        pending = 0
+        for item in items:
+            for position in self._positions(item):
+                pipe.setbit(self.key, position, 1)
+            pending += 1
+            if pending >= chunk_size:
+                written = bool(pipe.execute()) and written
+                pending = 0
+        if pending:
+            written = bool(pipe.execute()) and written
+        return written
+
+    # the complete set, e.g. every id in the table at startup; the marker is
+    # only set once every chunk is in
+    def fill(self, items, chunk_size: int = 10000):
+        self.redis.delete(self.filled_key)
+        if not self.add_many(items, chunk_size):
+            return False
+        self.redis.set(self.filled_key, 1)
+        return True
+
+    def might_contain(self, item):
+        pipe = self.redis.pipeline(transaction=False)
+        for position in self._positions(item):
+            pipe.getbit(self.key, position)
+        pipe.exists(self.key, self.filled_key)
+        results = pipe.execute()
+        # no answer (cache bypassed), or a bitmap or marker lost to a Redis
+        # restart, flush or eviction: nothing can be ruled out
+        if not results or results[-1] != 2:
+            return True
+        return all(results[:-1])
@@ -0,0 +1,122 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from prometheus_client import Counter, Histogram
+from perfkit.server_timing import add_phase
+
+CACHE_LOOKUPS = Counter(
+    'cache_lookups_total',
+    'Cache lookups by namespace, tier and result (hit, stale or miss)',
+    ['namespace', 'tier', 'result']
+)
+CACHE_ERRORS = Counter(
+    'cache_errors_total',
+    'Failed cache operations',
+    ['namespace', 'operation']
+)
+CACHE_SKIPPED = Counter(
+    'cache_skipped_total',
+    'Cache operations skipped because the Redis circuit was open',
+    ['namespace', 'operation']
+)
+CACHE_LATENCY = Histogram(
+    'cache_operation_duration_seconds',
+    'Latency of Redis cache operations',
+    ['namespace', 'operation'],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+CACHE_PAYLOAD_SIZE = Histogram(
+    'cache_payload_size_bytes',
+    'Size of values read from or written to the cache',
+    ['namespace', 'operation'],
+    buckets=(64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+)
+
+
+# what happened to the Redis calls inside one timed() block; the circuit
+# breaker answers failed and skipped calls with a fallback instead of
+# raising, so it reports them here
+class Outcome:
+    def __init__(self):
+        self.failed = False
+        self.skipped = False
+
+    # the result came from the fallback, not from Redis
+    @property
+    def bypassed(self):
+        return self.failed or self.skipped
+
+
+_outcome = ContextVar('cache_outcome', default=None)
+
+
+def report_fallback(reason: str):
+    outcome = _outcome.get()
+    if outcome is None:
+        return
+    if reason == 'failure':
+        outcome.failed = True
+    else:
+        outcome.skipped = True
+
+
+# per-namespace handle; label children are resolved once here so the hot
+# path only increments
+class CacheMetrics:
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._lookups = {}
+        self._latency = {}
+        self._sizes = {}
+
+    def lookup(self, result: str, tier: str = 'redis', count: int = 1):
+        child = self._lookups.get((tier, result))
+        if child is None:
+            child = self._lookups[(tier, result)] = CACHE_LOOKUPS.labels(self.namespace, tier, result)
+        child.inc(count)
+
+    def hit(self, tier: str = 'redis', count: int = 1):
+        self.lookup('hit', tier, count)
+
+    def miss(self, tier: str = 'redis', count: int = 1):
+        self.lookup('miss', tier, count)
+
+    def error(self, operation: str):
+        CACHE_ERRORS.labels(self.namespace, operation).inc()
+
+    def skipped(self, operation: str):
+        CACHE_SKIPPED.labels(self.namespace, operation).inc()
+
+    def payload(self, operation: str, data):
+        if not data:
+            return
+        child = self._sizes.get(operation)
+        if child is None:
+            child = self._sizes[operation] = CACHE_PAYLOAD_SIZE.labels(self.namespace, operation)
+        child.observe(len(data))
+
+    @contextmanager
+    def timed(self, operation: str):
+        child = self._latency.get(operation)
+        if child is None:
+            child = self._latency[operation] = CACHE_LATENCY.labels(self.namespace, operation)
+        outcome = Outcome()
+        token = _outcome.set(outcome)
+        start = time.perf_counter_ns()
+        try:
+            yield outcome
+        except Exception:
+            self.error(operation)
+            raise
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            _outcome.reset(token)
+            if outcome.failed:
+                self.error(operation)
+            if outcome.skipped:
+                self.skipped(operation)
+            else:
+                # a skipped call never reached Redis, its latency says nothing
+                child.observe(elapsed / 1e9)
+            # shows up as the cache phase in the Server-Timing header
+            add_phase('cache', elapsed)
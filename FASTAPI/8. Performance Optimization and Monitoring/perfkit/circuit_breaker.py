@@ -0,0 +1,209 @@
+import time
+import logging
+import threading
+from redis.exceptions import RedisError
+from prometheus_client import Counter, Gauge
+from perfkit.cache_metrics import report_fallback
+
+logger = logging.getLogger('perfkit.circuit_breaker')
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+# across workers (PROMETHEUS_MULTIPROC_DIR) the most open circuit is reported
+BREAKER_STATE = Gauge('circuit_breaker_state', 'Circuit state: 0 closed, 1 open, 2 half open', ['name'], multiprocess_mode='livemax')
+BREAKER_FAILURES = Counter('circuit_breaker_failures_total', 'Calls that failed and counted against the circuit', ['name'])
+BREAKER_SHORT_CIRCUITS = Counter('circuit_breaker_short_circuits_total', 'Calls skipped because the circuit was open', ['name'])
+
+# errors that mean "the cache is unavailable"; anything else is a bug and
+# should still surface
+FAILURES = (RedisError, OSError)
+
+
+# closed: calls go through. After failure_threshold consecutive failures the
+# circuit opens and calls are skipped; after reset_timeout a single probe is
+# let through (half open) and its result closes or re-opens the circuit.
+# on_fallback is called with 'failure' or 'skipped' for every call that is
+# answered by fallback(); by default it feeds the enclosing
+# CacheMetrics.timed() block.
+class CircuitBreaker:
+    def __init__(self, name: str = 'redis', failure_threshold: int = 5, reset_timeout: float = 5.0, on_fallback=report_fallback):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_fallback = on_fallback
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        BREAKER_STATE.labels(name).set(STATE_VALUES[CLOSED])
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            logger.warning("Circuit '%s' is now %s", self.name, state)
+            self.state = state
+            BREAKER_STATE.labels(self.name).set(STATE_VALUES[state])
+
+    def allow(self):
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+        BREAKER_SHORT_CIRCUITS.labels(self.name).inc()
+        self.on_fallback('skipped')
+        return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self._set_state(CLOSED)
+
+    def record_failure(self):
+        BREAKER_FAILURES.labels(self.name).inc()
+        self.on_fallback('failure')
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    # the call ended without a verdict on Redis (cancelled, or a bug raised);
+    # frees the half-open probe slot so the next call can probe instead
+    def release(self):
+        with self._lock:
+            self._probing = False
+
+
+# what each command returns while the cache is bypassed: reads miss, lock
+# and marker writes are not granted, plain writes are dropped
+def fallback(command: str, args, kwargs):
+    if command == 'mget':
+        keys = args[0] if args and isinstance(args[0], (list, tuple)) else args
+        return [None] * len(keys)
+    return None
+
+
+COMMANDS = {
+    'get', 'mget', 'set', 'setex', 'delete', 'expire', 'publish', 'eval',
+    'getbit', 'setbit', 'exists', 'incr', 'ping'
+}
+
+
+class _Resilient:
+    def __init__(self, client, breaker: CircuitBreaker = None):
+        self.client = client
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+
+    # False while calls are being skipped; callers that coordinate through
+    # Redis (locks, leases) should stop relying on it
+    @property
+    def healthy(self):
+        return self.breaker.state == CLOSED
+
+
+class ResilientRedis(_Resilient):
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if name not in COMMANDS:
+            return attr
+
+        def call(*args, **kwargs):
+            if not self.breaker.allow():
+                return fallback(name, args, kwargs)
+            try:
+                result = attr(*args, **kwargs)
+            except FAILURES:
+                self.breaker.record_failure()
+                return fallback(name, args, kwargs)
+            except BaseException:
+                self.breaker.release()
+                raise
+            self.breaker.record_success()
+            return result
+        return call
+
+    def pipeline(self, transaction: bool = True):
+        return ResilientPipeline(self.client.pipeline(transaction=transaction), self.breaker)
+
+
+class ResilientAsyncRedis(_Resilient):
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if name not in COMMANDS:
+            return attr
+
+        async def call(*args, **kwargs):
+            if not self.breaker.allow():
+                return fallback(name, args, kwargs)
+            try:
+                result = await attr(*args, **kwargs)
+            except FAILURES:
+                self.breaker.record_failure()
+                return fallback(name, args, kwargs)
+            except BaseException:
+                self.breaker.release()
+                raise
+            self.breaker.record_success()
+            return result
+        return call
+
+    def pipeline(self, transaction: bool = True):
+        return ResilientAsyncPipeline(self.client.pipeline(transaction=transaction), self.breaker)
+
+
+# queued commands are buffered locally, only execute() talks to Redis;
+# a bypassed execute returns no results
+class ResilientPipeline:
+    def __init__(self, pipe, breaker: CircuitBreaker):
+        self.pipe = pipe
+        self.breaker = breaker
+
+    def __getattr__(self, name):
+        return getattr(self.pipe, name)
+
+    def execute(self):
+        if not self.breaker.allow():
+            self.pipe.reset()
+            return []
+        try:
+            result = self.pipe.execute()
+        except FAILURES:
+            self.breaker.record_failure()
+            self.pipe.reset()
+            return []
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return result
+
+
+class ResilientAsyncPipeline(ResilientPipeline):
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.pipe.reset()
+
+    async def execute(self):
+        if not self.breaker.allow():
+            await self.pipe.reset()
+            return []
+        try:
+            result = await self.pipe.execute()
+        except FAILURES:
+            self.breaker.record_failure()
+            await self.pipe.reset()
+            return []
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return result
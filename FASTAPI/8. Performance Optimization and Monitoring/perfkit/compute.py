@@ -0,0 +1,81 @@
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from perfkit.cpu_pool import CPUPoolSettings
+
+# sum(i * 2 for i in range(n)), the hot loop of the profiling demos, in
+# several implementations. All return the same Python int.
+
+# same worker count as the server's CPU pool (CPU_POOL_WORKERS)
+WORKERS = CPUPoolSettings().workers
+# elements per NumPy chunk: bounds memory at ~8 MB per array
+CHUNK_SIZE = 1 << 20
+# int64 chunk sums stay exact below this n
+MAX_VECTOR_N = 4 * 10 ** 12
+
+
+def python_loop(n: int):
+    res = 0
+    for i in range(n):
+        res += (i * 2)
+    return res
+
+
+def closed_form(n: int):
+    # 2 * (0 + 1 + ... + n-1)
+    return n * (n - 1) if n > 0 else 0
+
+
+def chunk_sum(start: int, stop: int):
+    total = 0
+    for lo in range(start, stop, CHUNK_SIZE):
+        hi = min(lo + CHUNK_SIZE, stop)
+        total += int(np.arange(lo, hi, dtype=np.int64).sum()) * 2
+    return total
+
+
+def numpy_chunked(n: int):
+    if n > MAX_VECTOR_N:
+        raise ValueError(f'n above {MAX_VECTOR_N} overflows int64 chunk sums')
+    return chunk_sum(0, max(n, 0))
+
+
+_executor = None
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=WORKERS)
+        atexit.register(_executor.shutdown)
+    return _executor
+
+
+# one contiguous slice of range(n) per worker; sum(chunk_sum(lo, hi) for
+# each slice) is the result
+def slices(n: int, workers: int):
+    if n > MAX_VECTOR_N:
+        raise ValueError(f'n above {MAX_VECTOR_N} overflows int64 chunk sums')
+    step = -(-max(n, 0) // workers) or 1
+    return [(lo, min(lo + step, n)) for lo in range(0, n, step)]
+
+
+# for scripts; a server fans slices out to its own CPUPool instead of
+# starting this second pool
+def parallel(n: int, workers: int = WORKERS):
+    bounds = slices(n, workers)
+    return sum(_pool().map(chunk_sum, *zip(*bounds))) if bounds else 0
+
+
+BACKENDS = {
+    'closed_form': closed_form,
+    'python': python_loop,
+    'numpy': numpy_chunked,
+    'parallel': parallel
+}
+
+
+# the closed form is O(1) and always wins; the iterative backends are there
+# to be profiled and benchmarked against it
+def compute(n: int, backend: str = 'closed_form'):
+    return BACKENDS[backend](n)
@@ -0,0 +1,99 @@
+import os
+import time
+import asyncio
+import functools
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import FastAPI, HTTPException, Request
+from prometheus_client import Counter, Gauge, Histogram
+from perfkit.line_profiling import line_profiling
+
+# every server worker has its own pool: in-flight tasks add up, saturation
+# is that of the busiest pool
+CPU_POOL_IN_FLIGHT = Gauge('cpu_pool_in_flight', 'CPU-bound tasks running or queued in the process pool', multiprocess_mode='livesum')
+CPU_POOL_SATURATION = Gauge('cpu_pool_saturation_ratio', 'In-flight tasks per worker process; above 1 means tasks are queuing', multiprocess_mode='livemax')
+CPU_POOL_REJECTED = Counter('cpu_pool_rejected_total', 'CPU-bound tasks refused with 503 because the queue was full')
+CPU_POOL_DURATION = Histogram(
+    'cpu_pool_task_duration_seconds',
+    'Time from submitting a task to getting its result, queueing included',
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+
+class CPUPoolSettings:
+    def __init__(self):
+        self.workers = int(os.getenv('CPU_POOL_WORKERS', str(os.cpu_count() or 1)))
+        # tasks allowed to wait for a worker before new ones are refused
+        self.max_queue = int(os.getenv('CPU_POOL_MAX_QUEUE', str(self.workers * 2)))
+        self.retry_after = int(os.getenv('CPU_POOL_RETRY_AFTER', '1'))
+
+
+class PoolSaturated(Exception):
+    pass
+
+
+# Runs CPU-bound functions in worker processes so they hold neither the
+# event loop nor the GIL of the serving process. At most workers +
+# max_queue tasks are accepted; past that run() fails fast instead of
+# letting requests pile up behind the pool.
+class CPUPool:
+    def __init__(self, settings: CPUPoolSettings = None):
+        self.settings = settings or CPUPoolSettings()
+        self.executor = ProcessPoolExecutor(max_workers=self.settings.workers)
+        self.limit = self.settings.workers + self.settings.max_queue
+        self.in_flight = 0
+
+    def _track(self, delta: int):
+        self.in_flight += delta
+        CPU_POOL_IN_FLIGHT.set(self.in_flight)
+        CPU_POOL_SATURATION.set(self.in_flight / self.settings.workers)
+
+    async def run(self, fn, *args, **kwargs):
+        # while line profiling is on, profiled code has to run in this
+        # process for its stats to be collected; a thread keeps it off the
+        # event loop
+        if line_profiling.active():
+            return await asyncio.to_thread(fn, *args, **kwargs)
+
+        if self.in_flight >= self.limit:
+            CPU_POOL_REJECTED.inc()
+            raise PoolSaturated()
+
+        self._track(1)
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+        finally:
+            CPU_POOL_DURATION.observe(time.perf_counter() - start)
+            self._track(-1)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+# usable as the app's lifespan directly, or nested in a bigger one
+@asynccontextmanager
+async def cpu_pool_lifespan(app: FastAPI, settings: CPUPoolSettings = None):
+    app.state.cpu_pool = CPUPool(settings)
+    try:
+        yield
+    finally:
+        app.state.cpu_pool.shutdown()
+
+
+# dependency: `result = await run_cpu_bound(fn, *args)`. fn must be a
+# module-level function so it can be pickled to the worker process.
+def run_cpu_bound(request: Request):
+    pool = request.app.state.cpu_pool
+
+    async def run(fn, *args, **kwargs):
+        try:
+            return await pool.run(fn, *args, **kwargs)
+        except PoolSaturated:
+            raise HTTPException(
+                status_code=503,
+                detail='Server Busy',
+                headers={'Retry-After': str(pool.settings.retry_after)}
+            )
+    return run
@@ -0,0 +1,134 @@
+import os
+import asyncio
+import logging
+import importlib.util
+from contextlib import asynccontextmanager, suppress
+import httpx
+from fastapi import FastAPI, Request
+from prometheus_client import Gauge
+
+logger = logging.getLogger('perfkit.http_client')
+
+HTTP_POOL_CONNECTIONS = Gauge(
+    'http_client_pool_connections',
+    'Upstream connections in the shared httpx pool, by state (active or idle)',
+    ['state'],
+    multiprocess_mode='livesum'
+)
+HTTP_POOL_REQUESTS = Gauge(
+    'http_client_pool_requests',
+    'Upstream requests on a pooled connection (in_flight) or waiting for one (waiting)',
+    ['state'],
+    multiprocess_mode='livesum'
+)
+HTTP_POOL_UTILISATION = Gauge(
+    'http_client_pool_utilisation_ratio',
+    'Active connections per allowed connection',
+    multiprocess_mode='livemax'
+)
+
+
+class HTTPClientSettings:
+    def __init__(self):
+        self.max_connections = int(os.getenv('HTTP_MAX_CONNECTIONS', '100'))
+        self.max_keepalive_connections = int(os.getenv('HTTP_MAX_KEEPALIVE', '20'))
+        self.keepalive_expiry = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '30'))
+        self.http2 = os.getenv('HTTP_HTTP2', '0') == '1'
+        self.connect_timeout = float(os.getenv('HTTP_CONNECT_TIMEOUT', '2'))
+        self.read_timeout = float(os.getenv('HTTP_READ_TIMEOUT', '5'))
+        self.pool_timeout = float(os.getenv('HTTP_POOL_TIMEOUT', '2'))
+        # how often the pool gauges are refreshed
+        self.stats_interval = float(os.getenv('HTTP_POOL_STATS_INTERVAL', '5'))
+
+
+def create_http_client(settings: HTTPClientSettings = None):
+    settings = settings or HTTPClientSettings()
+
+    http2 = settings.http2
+    if http2 and importlib.util.find_spec('h2') is None:
+        logger.warning("HTTP/2 requested but 'h2' is not installed, falling back to HTTP/1.1")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_connections=settings.max_connections,
+        max_keepalive_connections=settings.max_keepalive_connections,
+        keepalive_expiry=settings.keepalive_expiry
+    )
+    timeout = httpx.Timeout(
+        connect=settings.connect_timeout,
+        read=settings.read_timeout,
+        write=settings.read_timeout,
+        pool=settings.pool_timeout
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+
+async def _sample_pool(client: httpx.AsyncClient, interval: float):
+    while True:
+        record_pool_stats(client)
+        await asyncio.sleep(interval)
+
+
+# opens one pooled client for the app's lifetime and closes it on shutdown;
+# meanwhile the pool gauges are refreshed every stats_interval
+@asynccontextmanager
+async def http_client_lifespan(app: FastAPI, settings: HTTPClientSettings = None):
+    settings = settings or HTTPClientSettings()
+    app.state.http_client = create_http_client(settings)
+    sampler = asyncio.create_task(_sample_pool(app.state.http_client, settings.stats_interval))
+    try:
+        yield app.state.http_client
+    finally:
+        sampler.cancel()
+        with suppress(asyncio.CancelledError):
+            await sampler
+        await app.state.http_client.aclose()
+
+
+# dependency
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    return request.app.state.http_client
+
+
+_internals_missing = False
+
+
+# Reads httpcore's private pool state, which httpx does not expose. If an
+# upgrade moves it the stats come back empty, with one warning, instead of
+# failing the caller.
+def pool_stats(client: httpx.AsyncClient):
+    global _internals_missing
+    try:
+        pool = client._transport._pool
+        connections = list(pool.connections)
+        requests = list(pool._requests)
+        idle = sum(1 for conn in connections if conn.is_idle())
+        waiting = sum(1 for req in requests if req.is_queued())
+        max_connections = pool._max_connections
+    except (AttributeError, TypeError):
+        if not _internals_missing:
+            _internals_missing = True
+            logger.warning('httpx pool internals not found, connection pool stats are unavailable')
+        return {}
+
+    return {
+        'max_connections': max_connections,
+        'open_connections': len(connections),
+        'active_connections': len(connections) - idle,
+        'idle_connections': idle,
+        'requests_in_flight': len(requests) - waiting,
+        'requests_waiting_for_connection': waiting,
+        'utilisation': round((len(connections) - idle) / max_connections, 3) if max_connections else None
+    }
+
+
+# pool_stats(), also written to the http_client_pool_* gauges
+def record_pool_stats(client: httpx.AsyncClient):
+    stats = pool_stats(client)
+    if stats:
+        HTTP_POOL_CONNECTIONS.labels('active').set(stats['active_connections'])
+        HTTP_POOL_CONNECTIONS.labels('idle').set(stats['idle_connections'])
+        HTTP_POOL_REQUESTS.labels('in_flight').set(stats['requests_in_flight'])
+        HTTP_POOL_REQUESTS.labels('waiting').set(stats['requests_waiting_for_connection'])
+        HTTP_POOL_UTILISATION.set(stats['utilisation'] or 0)
+    return stats
@@ -0,0 +1,116 @@
+import os
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_fastapi_instrumentator import Instrumentator
+from prometheus_fastapi_instrumentator.metrics import Info
+from prometheus_fastapi_instrumentator.routing import get_route_name
+from starlette.requests import Request
+
+
+def exponential_buckets(start: float, factor: float, count: int):
+    return tuple(round(start * factor ** i, 6) for i in range(count))
+
+
+# comma separated upper bounds, e.g. HTTP_LATENCY_BUCKETS=0.005,0.01,0.05
+def buckets_from_env(name: str, default: tuple):
+    value = os.getenv(name)
+    if not value:
+        return default
+    return tuple(sorted(float(bound) for bound in value.split(',')))
+
+
+# 0.25ms to ~11.6s, every bucket sqrt(2) times the one before: 2ms, 2.8ms,
+# 4ms, 5.7ms and 8ms all get their own bucket, so quantiles stay within
+# ~20% of the real value anywhere in the range
+LATENCY_BUCKETS = buckets_from_env('HTTP_LATENCY_BUCKETS', exponential_buckets(0.00025, 2 ** 0.5, 32))
+# 64 B to 16 MB in steps of 4
+SIZE_BUCKETS = buckets_from_env('HTTP_SIZE_BUCKETS', exponential_buckets(64, 4, 10))
+
+# Labels stay bounded: handler is the route template (/employees/{emp_id},
+# never the id), unmatched paths are grouped as 'none' and status codes as
+# 2xx..5xx. Only the request counter carries the status; the histograms,
+# which cost one series per bucket, are split by handler and method only.
+HTTP_REQUESTS = Counter('http_requests_total', 'Requests by route template, method and status class', ['handler', 'method', 'status'])
+HTTP_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Request latency by route template and method',
+    ['handler', 'method'],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_REQUEST_SIZE = Histogram(
+    'http_request_size_bytes',
+    'Request body size from Content-Length',
+    ['handler', 'method'],
+    buckets=SIZE_BUCKETS
+)
+HTTP_RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes',
+    'Response body size from Content-Length, 0 for streamed responses',
+    ['handler', 'method'],
+    buckets=SIZE_BUCKETS
+)
+# registered here, once per process, rather than by the instrumentator's
+# middleware on each app's first request, so any number of instrumented apps
+# can share a process (the caching apps and tests/ in one pytest session)
+HTTP_IN_PROGRESS = Gauge(
+    'http_requests_inprogress',
+    'Requests being handled by route template and method, summed across workers',
+    ['method', 'handler'],
+    multiprocess_mode='livesum'
+)
+
+
+def _content_length(headers):
+    try:
+        return int(headers.get('content-length', 0))
+    except ValueError:
+        return 0
+
+
+def record(info: Info):
+    handler, method = info.modified_handler, info.method
+    HTTP_REQUESTS.labels(handler, method, info.modified_status).inc()
+    HTTP_LATENCY.labels(handler, method).observe(info.modified_duration)
+    HTTP_REQUEST_SIZE.labels(handler, method).observe(_content_length(info.request.headers))
+    response_headers = getattr(info.response, 'headers', None)
+    HTTP_RESPONSE_SIZE.labels(handler, method).observe(_content_length(response_headers) if response_headers else 0)
+
+
+class InProgressMiddleware:
+    def __init__(self, app, excluded_handlers=()):
+        self.app = app
+        self.excluded_handlers = excluded_handlers
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        # same labels as the instrumentator: the route template, 'none' when
+        # nothing matched
+        handler = get_route_name(Request(scope), should_include_root_path=False) or 'none'
+        if any(pattern.search(handler) for pattern in self.excluded_handlers):
+            return await self.app(scope, receive, send)
+        in_progress = HTTP_IN_PROGRESS.labels(scope['method'], handler)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            in_progress.dec()
+
+
+class HTTPInstrumentator(Instrumentator):
+    def instrument(self, app, **kwargs):
+        super().instrument(app, **kwargs)
+        # added last, so it wraps the instrumentator's middleware
+        app.add_middleware(InProgressMiddleware, excluded_handlers=self.excluded_handlers)
+        return self
+
+
+# replaces Instrumentator() and its default metrics:
+#   http_instrumentator().instrument(app).expose(app)
+# also keeps http_requests_inprogress{handler, method}, summed across
+# workers in multiprocess mode
+def http_instrumentator(excluded_handlers=('/metrics',)):
+    return HTTPInstrumentator(
+        should_group_status_codes=True,
+        should_group_untemplated=True,
+        excluded_handlers=list(excluded_handlers)
+    ).add(record)
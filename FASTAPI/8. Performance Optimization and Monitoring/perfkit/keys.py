@@ -0,0 +1,55 @@
+import os
+import struct
+import hashlib
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+
+def _xxhash(data: bytes):
+    return xxhash.xxh3_64_hexdigest(data)
+
+
+def _blake2b(data: bytes):
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def _sha256(data: bytes):
+    return hashlib.sha256(data).hexdigest()
+
+
+HASHERS = {
+    'xxhash': _xxhash,
+    'blake2b': _blake2b,
+    'sha256': _sha256
+}
+
+# cache keys only need to be well spread, not collision-proof against an
+# attacker, so a fast 64-bit hash is plenty
+CACHE_KEY_HASH = os.getenv('CACHE_KEY_HASH', 'xxhash' if xxhash is not None else 'blake2b')
+
+
+def get_hasher(name: str = None):
+    name = name or CACHE_KEY_HASH
+    if name == 'xxhash' and xxhash is None:
+        name = 'blake2b'
+    return HASHERS[name]
+
+
+# readable keys for integer ids, there is nothing to gain from hashing them
+def int_key(prefix: str, value: int):
+    return f'{prefix}:{value}'
+
+
+# packs a fixed number of floats into bytes and hashes them, which skips
+# building a dict and a sorted JSON string per request
+class FloatVectorKey:
+    def __init__(self, prefix: str, size: int, hasher: str = None):
+        self.prefix = prefix
+        self._struct = struct.Struct(f'<{size}d')
+        self._hash = get_hasher(hasher)
+
+    def __call__(self, values):
+        return f'{self.prefix}:{self._hash(self._struct.pack(*values))}'
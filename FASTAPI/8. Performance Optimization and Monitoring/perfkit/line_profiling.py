@@ -0,0 +1,159 @@
+import io
+import os
+import logging
+import builtins
+import tempfile
+import functools
+import threading
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse, Response
+from perfkit.admin import check_admin_token
+
+try:
+    from line_profiler import LineProfiler
+except ImportError:
+    LineProfiler = None
+
+logger = logging.getLogger('perfkit.line_profiling')
+
+# comma separated function names to profile from startup, '*' for all
+LINE_PROFILE = os.getenv('LINE_PROFILE', '')
+
+
+# Line-level profiling that is off unless asked for. @profile only registers
+# the function; while it is not enabled the wrapper calls straight through,
+# so decorated code can stay in a running server. Enabling a function gives
+# it its own LineProfiler, whose stats accumulate until reset.
+class LineProfiling:
+    def __init__(self, enabled: str = LINE_PROFILE):
+        self.functions = {}
+        self._profiled = {}
+        self._profilers = {}
+        self._lock = threading.Lock()
+        self._enable_all = enabled.strip() == '*'
+        self._requested = {name.strip() for name in enabled.split(',') if name.strip()}
+
+    def profile(self, fn):
+        # under kernprof the real builtin exists and takes over
+        if hasattr(builtins, 'profile'):
+            return builtins.profile(fn)
+
+        name = fn.__qualname__
+        self.functions[name] = fn
+        if self._enable_all or name in self._requested:
+            if LineProfiler is None:
+                logger.warning('LINE_PROFILE is set but line_profiler is not installed')
+            else:
+                self.enable(name)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            profiled = self._profiled.get(name)
+            if profiled is None:
+                return fn(*args, **kwargs)
+            return profiled(*args, **kwargs)
+        return wrapper
+
+    def is_enabled(self, name: str):
+        return name in self._profiled
+
+    def active(self):
+        return bool(self._profiled)
+
+    def enable(self, name: str):
+        if LineProfiler is None:
+            raise RuntimeError('line_profiler is not installed')
+        if name not in self.functions:
+            raise KeyError(name)
+        with self._lock:
+            profiler = self._profilers.get(name)
+            if profiler is None:
+                profiler = self._profilers[name] = LineProfiler()
+            self._profiled[name] = profiler(self.functions[name])
+
+    # stats are kept until reset, so a function can be toggled on and off
+    def disable(self, name: str):
+        self._profiled.pop(name, None)
+
+    def reset(self, name: str):
+        self._profilers.pop(name, None)
+        if name in self._profiled:
+            self.enable(name)
+
+    def text(self, name: str):
+        profiler = self._profilers.get(name)
+        if profiler is None:
+            raise KeyError(name)
+        out = io.StringIO()
+        profiler.print_stats(stream=out, stripzeros=True)
+        return out.getvalue()
+
+    # the .lprof format kernprof writes; view with python -m line_profiler
+    def dump(self, name: str):
+        profiler = self._profilers.get(name)
+        if profiler is None:
+            raise KeyError(name)
+        with tempfile.NamedTemporaryFile(suffix='.lprof') as f:
+            profiler.dump_stats(f.name)
+            return f.read()
+
+
+line_profiling = LineProfiling()
+profile = line_profiling.profile
+
+
+def get_function(name: str):
+    if name not in line_profiling.functions:
+        raise HTTPException(status_code=404, detail='Function Not Found')
+    return name
+
+
+# app.include_router(router) adds, for requests with an X-Admin-Token header
+# matching ADMIN_TOKEN:
+#   GET    /admin/line-profile                       registered functions
+#   POST   /admin/line-profile/{name}                start profiling
+#   DELETE /admin/line-profile/{name}                stop (stats are kept)
+#   GET    /admin/line-profile/{name}/results        text report
+#   GET    /admin/line-profile/{name}/results?format=lprof   download
+#   DELETE /admin/line-profile/{name}/results        reset stats
+router = APIRouter(prefix='/admin/line-profile', dependencies=[Depends(check_admin_token)])
+
+
+@router.get('')
+def list_functions():
+    return {name: line_profiling.is_enabled(name) for name in line_profiling.functions}
+
+
+@router.post('/{name}')
+def enable_function(name: str = Depends(get_function)):
+    try:
+        line_profiling.enable(name)
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return {'name': name, 'enabled': True}
+
+
+@router.delete('/{name}')
+def disable_function(name: str = Depends(get_function)):
+    line_profiling.disable(name)
+    return {'name': name, 'enabled': False}
+
+
+@router.get('/{name}/results')
+def get_results(name: str = Depends(get_function), format: str = 'text'):
+    try:
+        if format == 'lprof':
+            return Response(
+                line_profiling.dump(name),
+                media_type='application/octet-stream',
+                headers={'Content-Disposition': f'attachment; filename="{name}.lprof"'}
+            )
+        return PlainTextResponse(line_profiling.text(name))
+    except KeyError:
+        raise HTTPException(status_code=404, detail='No Results, Enable Profiling First')
+
+
+@router.delete('/{name}/results')
+def reset_results(name: str = Depends(get_function)):
+    line_profiling.reset(name)
+    return {'name': name, 'reset': True}
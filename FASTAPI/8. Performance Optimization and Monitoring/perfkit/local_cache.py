@@ -0,0 +1,175 @@
+import threading
+import time
+import logging
+from collections import Counter, OrderedDict
+from perfkit.circuit_breaker import FAILURES
+from perfkit.serializers import get_serializer
+from perfkit.cache_metrics import CacheMetrics
+
+INVALIDATION_CHANNEL = 'cache:invalidate'
+
+logger = logging.getLogger('perfkit.local_cache')
+
+
+# bounded in-process LRU with a per-entry TTL
+class LocalCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# local tier in front of Redis; invalidations are broadcast over pub/sub
+# so every worker drops its local copy together
+class TwoTierCache:
+    def __init__(self, redis_client, local: LocalCache = None, channel: str = INVALIDATION_CHANNEL, serializer=None, metrics: CacheMetrics = None):
+        self.redis = redis_client
+        self.serializer = serializer if serializer is not None else get_serializer()
+        self.metrics = metrics if metrics is not None else CacheMetrics('default')
+        self.local = local if local is not None else LocalCache()
+        self.channel = channel
+        self._stats = Counter()
+        self._stats_lock = threading.Lock()
+        self._listener = None
+
+    # also used by callers to count their own events next to the tier stats
+    def incr(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is not None:
+            self.incr('local_hits')
+            self.metrics.hit('local')
+            return value
+        self.incr('local_misses')
+        self.metrics.miss('local')
+
+        # the remaining TTL comes back in the same round trip
+        with self.metrics.timed('get') as outcome:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.pttl(key)
+            cached, remaining_ms = pipe.execute() or (None, -2)
+        if cached is None:
+            # Redis was unavailable, not empty
+            if not outcome.bypassed:
+                self.incr('redis_misses')
+                self.metrics.miss()
+            return None
+        self.incr('redis_hits')
+        self.metrics.hit()
+        self.metrics.payload('get', cached)
+
+        value = self.serializer.loads(cached)
+        # -1: the key never expires in Redis
+        ttl = self.local.ttl if remaining_ms == -1 else max(remaining_ms, 0) / 1000
+        self.local.set(key, value, self._local_ttl(ttl))
+        return value
+
+    # the local copy never outlives the Redis one, so a short ttl (such as a
+    # negative entry's) is not stretched to the local default
+    def _local_ttl(self, ttl: float):
+        return min(ttl, self.local.ttl)
+
+    # broadcast=True also drops the key from the other workers' local tiers,
+    # which is what a write-through of a changed value needs
+    def set(self, key, value, ttl: int, broadcast: bool = False):
+        data = self.serializer.dumps(value)
+        self.metrics.payload('set', data)
+        with self.metrics.timed('set'):
+            self.redis.setex(key, ttl, data)
+        if broadcast:
+            self.redis.publish(self.channel, key)
+        self.local.set(key, value, self._local_ttl(ttl))
+
+    # bulk load, one pipelined round-trip; no broadcast since nothing is
+    # being replaced
+    def set_many(self, items, ttl: int):
+        pipe = self.redis.pipeline(transaction=False)
+        for key, value in items:
+            data = self.serializer.dumps(value)
+            self.metrics.payload('set', data)
+            pipe.setex(key, ttl, data)
+            self.local.set(key, value, self._local_ttl(ttl))
+        with self.metrics.timed('set_many'):
+            pipe.execute()
+
+    def invalidate(self, key):
+        self.local.delete(key)
+        self.redis.delete(key)
+        self.redis.publish(self.channel, key)
+
+    def _on_invalidate(self, message):
+        key = message['data']
+        if isinstance(key, bytes):
+            key = key.decode()
+        self.local.delete(key)
+        self.incr('invalidations_received')
+
+    # without the listener, local entries are only bounded by the local TTL;
+    # that is acceptable while Redis is down, so startup carries on
+    def start_listener(self):
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(**{self.channel: self._on_invalidate})
+        except FAILURES:
+            logger.warning('Redis unavailable, running without cache invalidation messages')
+            return
+        self._listener = pubsub.run_in_thread(
+            sleep_time=0.05, daemon=True, exception_handler=self._on_listener_error
+        )
+
+    # the pubsub reconnects and resubscribes on its next read; back off so a
+    # dead server does not turn the thread into a busy loop
+    def _on_listener_error(self, error, pubsub, thread):
+        logger.warning('Invalidation listener error: %s', error)
+        time.sleep(1)
+
+    def stop_listener(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        for name in ('local_hits', 'local_misses', 'redis_hits', 'redis_misses', 'invalidations_received'):
+            stats.setdefault(name, 0)
+        # every local hit is a Redis round-trip that never happened
+        stats['redis_round_trips_saved'] = stats['local_hits']
+        stats['local_size'] = len(self.local)
+        return stats
@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from prometheus_client import Counter, Histogram
+from perfkit.routes import endpoint_codes, route_of
+
+logger = logging.getLogger('perfkit.loop_monitor')
+
+LOOP_LAG_THRESHOLD = float(os.getenv('LOOP_LAG_THRESHOLD', '0.1'))
+LOOP_LAG_INTERVAL = float(os.getenv('LOOP_LAG_INTERVAL', '0.05'))
+
+LOOP_LAG = Histogram(
+    'event_loop_lag_seconds',
+    'How late the event loop ran a callback scheduled to run right away',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+LOOP_BLOCKED = Counter('event_loop_blocked_total', 'Times the event loop was held past the threshold', ['route'])
+
+
+# A heartbeat task wakes up every `interval` on the event loop; how late it
+# wakes is the loop lag. A watchdog thread notices when the heartbeat stops
+# for longer than `threshold` and, while the loop is still stuck, logs the
+# loop thread's stack and the route whose handler is on it - typically a
+# blocking call such as time.sleep inside an async def endpoint.
+#
+#   app.add_middleware(LoopLagMiddleware)
+class LoopLagMiddleware:
+    def __init__(self, app, threshold: float = LOOP_LAG_THRESHOLD, interval: float = LOOP_LAG_INTERVAL):
+        self.app = app
+        self.threshold = threshold
+        self.interval = interval
+        self.routes = {}
+        self._route_count = -1
+        self._loop = None
+        self._loop_thread = None
+        self._last_beat = time.perf_counter()
+        self._reported_beat = None
+        self._watchdog = None
+
+    async def __call__(self, scope, receive, send):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._start(loop)
+        if scope['type'] == 'http':
+            routes = getattr(scope.get('app'), 'routes', [])
+            if len(routes) != self._route_count:
+                self.routes = endpoint_codes(routes)
+                self._route_count = len(routes)
+        await self.app(scope, receive, send)
+
+    def _start(self, loop):
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        loop.create_task(self._heartbeat(loop))
+        if self._watchdog is None:
+            self._watchdog = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+            self._watchdog.start()
+
+    async def _heartbeat(self, loop):
+        while loop is self._loop:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            LOOP_LAG.observe(max(0.0, now - start - self.interval))
+            self._last_beat = now
+
+    def _watch(self):
+        while True:
+            time.sleep(self.threshold / 4)
+            beat = self._last_beat
+            stalled = time.perf_counter() - beat - self.interval
+            if stalled > self.threshold and self._reported_beat != beat:
+                self._reported_beat = beat
+                self._report(stalled)
+
+    def _report(self, stalled: float):
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return
+        route = route_of(frame, self.routes) or 'unknown'
+        LOOP_BLOCKED.labels(route).inc()
+        logger.warning(
+            'Event loop blocked for %.3fs+ in route %s:\n%s',
+            stalled, route, ''.join(traceback.format_stack(frame))
+        )
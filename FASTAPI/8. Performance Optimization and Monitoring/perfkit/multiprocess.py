@@ -0,0 +1,34 @@
+import os
+import glob
+from prometheus_client import multiprocess
+
+# With several workers every process keeps its own metrics, so a scrape only
+# sees the worker that answered it. When PROMETHEUS_MULTIPROC_DIR is set in
+# the environment before the workers start, prometheus_client writes every
+# value to an mmap'd file in that directory instead, and /metrics merges the
+# files of all workers. Instrumentator().expose() already does that merge.
+#
+# Only metrics built from Counter/Gauge/Histogram/Summary are shared this
+# way; custom collectors registered on REGISTRY stay per process and are not
+# part of the merged output.
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+
+
+def multiprocess_enabled():
+    return MULTIPROC_DIR is not None
+
+
+# once, in the parent, before any worker exists: files left by the previous
+# run would otherwise be merged into the new one
+def prepare_multiproc_dir(path: str = MULTIPROC_DIR):
+    os.makedirs(path, exist_ok=True)
+    for f in glob.glob(os.path.join(path, '*.db')):
+        os.remove(f)
+
+
+# drops the live gauges of a dead worker; counters and histograms keep its
+# totals so they never go backwards
+def mark_process_dead(pid: int, path: str = MULTIPROC_DIR):
+    if path:
+        multiprocess.mark_process_dead(pid, path)
+
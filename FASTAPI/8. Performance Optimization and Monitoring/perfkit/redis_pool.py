@@ -0,0 +1,59 @@
+import os
+import redis.asyncio as aioredis
+from perfkit.circuit_breaker import CircuitBreaker, ResilientAsyncRedis
+
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', '50'))
+REDIS_POOL_TIMEOUT = float(os.getenv('REDIS_POOL_TIMEOUT', '2'))
+# short socket timeouts: a cache that answers slowly is worse than no cache
+REDIS_CONNECT_TIMEOUT = float(os.getenv('REDIS_CONNECT_TIMEOUT', '0.25'))
+REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', '0.5'))
+REDIS_BREAKER_THRESHOLD = int(os.getenv('REDIS_BREAKER_THRESHOLD', '5'))
+REDIS_BREAKER_RESET = float(os.getenv('REDIS_BREAKER_RESET', '5'))
+
+_pool = None
+breaker = CircuitBreaker('redis', failure_threshold=REDIS_BREAKER_THRESHOLD, reset_timeout=REDIS_BREAKER_RESET)
+
+
+# one connection pool per process; callers wait for a free connection
+# instead of opening unbounded new ones under load
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = aioredis.BlockingConnectionPool.from_url(
+            REDIS_URL,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            timeout=REDIS_POOL_TIMEOUT,
+            socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+            socket_timeout=REDIS_SOCKET_TIMEOUT
+        )
+    return _pool
+
+
+# every client shares the process breaker, so once Redis is known to be down
+# all callers skip it and go straight to the source of truth
+def get_redis():
+    return ResilientAsyncRedis(aioredis.Redis(connection_pool=get_pool()), breaker)
+
+
+async def close_redis():
+    global _pool
+    if _pool is not None:
+        await _pool.disconnect()
+        _pool = None
+
+
+# batch helpers: one round-trip for many keys
+async def mget(client, keys):
+    if not keys:
+        return []
+    return await client.mget(keys)
+
+
+async def setex_many(client, items, ttl: int):
+    if not items:
+        return []
+    async with client.pipeline(transaction=False) as pipe:
+        for key, value in items:
+            pipe.setex(key, ttl, value)
+        return await pipe.execute()
@@ -0,0 +1,18 @@
+# code object of each endpoint -> route path. A frame running one of these
+# codes tells which route a stack belongs to, which is all a sampler or
+# watchdog in another thread can see.
+def endpoint_codes(routes):
+    return {
+        route.endpoint.__code__: route.path
+        for route in routes
+        if hasattr(getattr(route, 'endpoint', None), '__code__')
+    }
+
+
+def route_of(frame, codes):
+    while frame is not None:
+        route = codes.get(frame.f_code)
+        if route is not None:
+            return route
+        frame = frame.f_back
+    return None
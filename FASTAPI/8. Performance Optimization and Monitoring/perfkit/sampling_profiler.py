@@ -0,0 +1,201 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+from collections import Counter
+from urllib.parse import parse_qs
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, PlainTextResponse
+from perfkit.admin import valid_admin_token
+from perfkit.routes import endpoint_codes
+
+PROFILE_HZ = float(os.getenv('PROFILE_HZ', '100'))
+PROFILE_ALWAYS_ON = os.getenv('PROFILE_ALWAYS_ON', '1') == '1'
+PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', '60'))
+MAX_DEPTH = 128
+
+
+# Statistical profiler: a daemon thread looks at every thread's stack `hz`
+# times a second and counts the stacks that are inside a route handler.
+# Nothing is traced per call, so the cost is the sampling itself: tens of
+# microseconds per sample, around 1% of one core at 100 Hz.
+class SamplingProfiler:
+    def __init__(self, hz: float = PROFILE_HZ, always_on: bool = PROFILE_ALWAYS_ON):
+        self.interval = 1.0 / hz
+        self.hz = hz
+        self.always_on = always_on
+        self.total = Counter()
+        self.routes = {}
+        self._labels = {}
+        self._sessions = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._sampling_time = 0.0
+        self._started_at = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._started_at = time.perf_counter()
+            self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self._thread.start()
+
+    def register_routes(self, routes):
+        self.routes = endpoint_codes(routes)
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+        return label
+
+    # stacks are kept as code objects and only turned into strings when a
+    # profile is read, which keeps each sample cheap
+    def _sample(self):
+        own = threading.get_ident()
+        stacks = []
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            codes = []
+            route = None
+            while frame is not None and len(codes) < MAX_DEPTH:
+                code = frame.f_code
+                if route is None:
+                    route = self.routes.get(code)
+                codes.append(code)
+                frame = frame.f_back
+            # idle loops and threadpool workers waiting for work are skipped
+            if route is not None:
+                stacks.append((route, tuple(codes)))
+        return stacks
+
+    def _format(self, samples: Counter):
+        stacks = Counter()
+        for (route, codes), count in samples.items():
+            names = [self._label(code) for code in reversed(codes)]
+            stacks[';'.join([route] + names)] += count
+        return stacks
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if not (self.always_on or self._sessions):
+                continue
+            start = time.thread_time()
+            stacks = self._sample()
+            with self._lock:
+                if self.always_on:
+                    self.total.update(stacks)
+                for session in self._sessions:
+                    session.update(stacks)
+            self._sampling_time += time.thread_time() - start
+
+    # CPU the sampler thread spent sampling, as a share of wall time
+    def overhead(self):
+        elapsed = time.perf_counter() - self._started_at
+        return self._sampling_time / elapsed if elapsed > 0 else 0.0
+
+    # samples taken over the next `seconds`; 0 returns everything collected
+    # by the always-on profile so far
+    async def collect(self, seconds: float):
+        if seconds <= 0:
+            with self._lock:
+                return self._format(self.total)
+        session = Counter()
+        with self._lock:
+            self._sessions.append(session)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            with self._lock:
+                self._sessions.remove(session)
+        return self._format(session)
+
+
+def to_collapsed(stacks: Counter):
+    return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+
+# speedscope "sampled" format, one profile per route
+# https://github.com/jlfwong/speedscope/wiki/Importing-from-custom-sources
+def to_speedscope(stacks: Counter, hz: float):
+    frames, index = [], {}
+    profiles = {}
+    for stack, count in stacks.items():
+        route, *names = stack.split(';')
+        sample = []
+        for name in names:
+            if name not in index:
+                index[name] = len(frames)
+                frames.append({'name': name})
+            sample.append(index[name])
+        profile = profiles.setdefault(route, {'samples': [], 'weights': []})
+        profile['samples'].append(sample)
+        profile['weights'].append(count / hz)
+
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'exporter': 'perfkit',
+        'shared': {'frames': frames},
+        'profiles': [
+            {
+                'type': 'sampled',
+                'name': route,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(profile['weights']),
+                'samples': profile['samples'],
+                'weights': profile['weights']
+            }
+            for route, profile in profiles.items()
+        ]
+    }
+
+
+# Pure ASGI middleware: starts the sampler with the app and answers
+# GET {path}?seconds=N&format=collapsed|speedscope itself, so one
+# add_middleware call is all an app needs.
+class SamplingProfilerMiddleware:
+    def __init__(self, app, hz: float = PROFILE_HZ, always_on: bool = PROFILE_ALWAYS_ON, path: str = '/debug/profile'):
+        self.app = app
+        self.path = path
+        self.profiler = SamplingProfiler(hz=hz, always_on=always_on)
+        self._route_count = -1
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        routes = getattr(scope.get('app'), 'routes', [])
+        if len(routes) != self._route_count:
+            self.profiler.register_routes(routes)
+            self._route_count = len(routes)
+        self.profiler.start()
+
+        if scope['path'] == self.path:
+            return await self.profile(scope, receive, send)
+        await self.app(scope, receive, send)
+
+    # same X-Admin-Token check as the line-profiling routes
+    async def profile(self, scope, receive, send):
+        if not valid_admin_token(Headers(scope=scope).get('x-admin-token')):
+            response = JSONResponse({'detail': 'Unauthorized'}, status_code=403)
+            return await response(scope, receive, send)
+
+        query = parse_qs(scope['query_string'].decode())
+        try:
+            seconds = float(query.get('seconds', ['10'])[0])
+        except ValueError:
+            seconds = -1
+        if not 0 <= seconds <= PROFILE_MAX_SECONDS:
+            response = JSONResponse({'detail': f'seconds must be between 0 and {PROFILE_MAX_SECONDS:g}'}, status_code=400)
+            return await response(scope, receive, send)
+
+        stacks = await self.profiler.collect(seconds)
+        headers = {'X-Profiler-Overhead': f'{self.profiler.overhead():.4f}'}
+        if query.get('format', ['collapsed'])[0] == 'speedscope':
+            response = JSONResponse(to_speedscope(stacks, self.profiler.hz), headers=headers)
+        else:
+            response = PlainTextResponse(to_collapsed(stacks), headers=headers)
+        await response(scope, receive, send)
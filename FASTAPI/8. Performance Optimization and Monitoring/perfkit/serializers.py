@@ -0,0 +1,96 @@
+import os
+import json
+import logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger('perfkit.serializers')
+
+# every payload starts with a 4 byte header:
+#   magic | format version | codec id | flags
+# so readers can tell formats apart and the layout can change later.
+# Payloads without the magic byte are legacy plain JSON.
+MAGIC = 0xFC
+FORMAT_VERSION = 1
+FLAG_ZSTD = 0x01
+
+JSON, ORJSON, MSGPACK = 1, 2, 3
+CODECS = {'json': JSON, 'orjson': ORJSON, 'msgpack': MSGPACK}
+
+
+def _available(codec: int):
+    return {JSON: True, ORJSON: orjson is not None, MSGPACK: msgpack is not None}[codec]
+
+
+def _encode(codec: int, obj):
+    if codec == ORJSON:
+        return orjson.dumps(obj)
+    if codec == MSGPACK:
+        return msgpack.packb(obj, use_bin_type=True)
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+def _decode(codec: int, body: bytes):
+    if codec == ORJSON:
+        return orjson.loads(body)
+    if codec == MSGPACK:
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(body)
+
+
+class Serializer:
+    def __init__(self, codec: str = 'orjson', compress_threshold: int = 1024, level: int = 3):
+        codec_id = CODECS[codec]
+        if not _available(codec_id):
+            logger.warning("Serializer '%s' is not installed, falling back to json", codec)
+            codec_id = JSON
+        self.codec = codec_id
+        # compressing small payloads costs more CPU than the bytes it saves
+        self.compress_threshold = compress_threshold if zstandard is not None else None
+        self._compressor = zstandard.ZstdCompressor(level=level) if zstandard is not None else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+
+    def dumps(self, obj) -> bytes:
+        body = _encode(self.codec, obj)
+        flags = 0
+        if self.compress_threshold is not None and len(body) >= self.compress_threshold:
+            body = self._compressor.compress(body)
+            flags |= FLAG_ZSTD
+        return bytes((MAGIC, FORMAT_VERSION, self.codec, flags)) + body
+
+    def loads(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        if not data or data[0] != MAGIC:
+            return json.loads(data)
+
+        version, codec, flags = data[1], data[2], data[3]
+        if version != FORMAT_VERSION:
+            raise ValueError(f'Unsupported cache payload version {version}')
+        if codec not in CODECS.values() or not _available(codec):
+            raise ValueError(f'Cannot decode cache payload with codec id {codec}')
+        body = data[4:]
+        if flags & FLAG_ZSTD:
+            if self._decompressor is None:
+                raise ValueError('Payload is zstd compressed but zstandard is not installed')
+            body = self._decompressor.decompress(body)
+        return _decode(codec, body)
+
+
+def get_serializer():
+    codec = os.getenv('CACHE_SERIALIZER', 'orjson')
+    threshold = int(os.getenv('CACHE_COMPRESS_THRESHOLD', '1024'))
+    return Serializer(codec, compress_threshold=threshold)
@@ -0,0 +1,76 @@
+import asyncio
+import uuid
+
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+# one in-flight call per key inside this process; every other caller
+# awaits the same future instead of repeating the work
+class SingleFlight:
+    def __init__(self):
+        self._inflight = {}
+
+    async def do(self, key, fn):
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._run(key, fn))
+            self._inflight[key] = future
+        # a cancelled waiter (client went away) must not cancel the shared call
+        return await asyncio.shield(future)
+
+    async def _run(self, key, fn):
+        try:
+            return await fn()
+        finally:
+            self._inflight.pop(key, None)
+
+    def in_flight(self):
+        return len(self._inflight)
+
+
+# same idea across uvicorn workers: the worker that wins a short Redis lock
+# runs fn (which must fill the cache), the others poll the cache via load
+class RedisSingleFlight:
+    def __init__(self, redis_client, load, lock_ttl: float = 10, poll_interval: float = 0.05):
+        self.redis = redis_client
+        self.load = load
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self._local = SingleFlight()
+
+    async def do(self, key, fn):
+        # coalesce locally first so only one coroutine per worker touches the lock
+        return await self._local.do(key, lambda: self._do(key, fn))
+
+    async def _do(self, key, fn):
+        lock_key = f'lock:{key}'
+        token = uuid.uuid4().hex
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lock_ttl
+
+        while True:
+            # no lock can be taken while the cache is bypassed; fall back to
+            # per-worker coalescing instead of waiting out the deadline
+            if not getattr(self.redis, 'healthy', True):
+                return await fn()
+            if await self.redis.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000)):
+                try:
+                    return await fn()
+                finally:
+                    await self.redis.eval(RELEASE_SCRIPT, 1, lock_key, token)
+
+            await asyncio.sleep(self.poll_interval)
+            value = await self.load(key)
+            if value is not None:
+                return value
+            # the lock holder crashed or is too slow, stop waiting for it
+            if loop.time() >= deadline:
+                return await fn()
+
+    def in_flight(self):
+        return self._local.in_flight()
@@ -0,0 +1,104 @@
+import math
+import time
+import random
+import asyncio
+import logging
+import functools
+from perfkit.singleflight import SingleFlight
+from perfkit.serializers import get_serializer
+from perfkit.cache_metrics import CacheMetrics
+
+logger = logging.getLogger('perfkit.swr')
+
+
+# Redis cache with a soft and a hard TTL per entry.
+#   fresh  (age < soft_ttl)            -> served as is
+#   stale  (soft_ttl <= age < hard_ttl) -> served, one background task refreshes it
+#   gone   (age >= hard_ttl)           -> recomputed inline, misses are coalesced
+# With beta > 0 an entry can also be refreshed early (XFetch): the closer it is
+# to its soft expiry and the slower it was to compute, the likelier a refresh,
+# so refreshes of popular keys are spread out instead of landing together.
+class SWRCache:
+    def __init__(self, redis_client, flight=None, beta: float = 1.0, serializer=None, metrics: CacheMetrics = None):
+        self.redis = redis_client
+        self.serializer = serializer if serializer is not None else get_serializer()
+        self.metrics = metrics if metrics is not None else CacheMetrics('default')
+        self.flight = flight if flight is not None else SingleFlight()
+        self.beta = beta
+        self._refreshing = set()
+        self._tasks = set()
+
+    def encode(self, value, delta: float, soft_ttl: float):
+        return self.serializer.dumps({'v': value, 'delta': delta, 'soft': time.time() + soft_ttl})
+
+    def decode(self, raw):
+        return self.serializer.loads(raw) if raw else None
+
+    async def peek(self, key):
+        entry = self.decode(await self.redis.get(key))
+        return entry['v'] if entry else None
+
+    def _should_refresh(self, entry, now: float):
+        if now >= entry['soft']:
+            return True
+        if self.beta <= 0:
+            return False
+        # 1 - random() is in (0, 1], so the log is always defined
+        return now - entry['delta'] * self.beta * math.log(1.0 - random.random()) >= entry['soft']
+
+    async def _compute_and_store(self, key, fn, args, kwargs, soft_ttl, hard_ttl):
+        start = time.perf_counter()
+        value = await fn(*args, **kwargs)
+        if value is not None:
+            delta = time.perf_counter() - start
+            data = self.encode(value, delta, soft_ttl)
+            self.metrics.payload('set', data)
+            with self.metrics.timed('set'):
+                await self.redis.set(key, data, ex=hard_ttl)
+        return value
+
+    def _refresh_in_background(self, key, fn, args, kwargs, soft_ttl, hard_ttl):
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                # only one worker refreshes a given key per soft period
+                if await self.redis.set(f'{key}:refresh', 1, nx=True, ex=max(1, int(soft_ttl))):
+                    await self._compute_and_store(key, fn, args, kwargs, soft_ttl, hard_ttl)
+            except Exception:
+                # the stale value keeps being served until the hard TTL
+                logger.exception('Background refresh failed for %s', key)
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.ensure_future(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def cached(self, key, soft_ttl: float, hard_ttl: float):
+        def decorator(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                cache_key = key(*args, **kwargs)
+                with self.metrics.timed('get') as outcome:
+                    raw = await self.redis.get(cache_key)
+                entry = self.decode(raw)
+                if entry is not None:
+                    self.metrics.payload('get', raw)
+                    now = time.time()
+                    self.metrics.lookup('stale' if now >= entry['soft'] else 'hit')
+                    if self._should_refresh(entry, now):
+                        self._refresh_in_background(cache_key, fn, args, kwargs, soft_ttl, hard_ttl)
+                    return entry['v']
+
+                # Redis was unavailable, not empty
+                if not outcome.bypassed:
+                    self.metrics.miss()
+                return await self.flight.do(
+                    cache_key,
+                    lambda: self._compute_and_store(cache_key, fn, args, kwargs, soft_ttl, hard_ttl)
+                )
+            return wrapper
+        return decorator
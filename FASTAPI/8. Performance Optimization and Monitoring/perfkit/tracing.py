@@ -0,0 +1,136 @@
+import os
+import json
+import base64
+import logging
+import threading
+from fastapi import FastAPI
+from perfkit.server_timing import trace_phases
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter, SpanExportResult
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+except ImportError:
+    trace = None
+    SpanExporter = object
+
+logger = logging.getLogger('perfkit.tracing')
+
+
+class TracingSettings:
+    def __init__(self):
+        self.enabled = os.getenv('TRACING', '0') == '1'
+        self.service_name = os.getenv('OTEL_SERVICE_NAME')
+        # console, file (OTLP JSON lines) or otlp (OTLP/HTTP to OTEL_EXPORTER_OTLP_ENDPOINT)
+        self.exporter = os.getenv('TRACING_EXPORTER', 'console')
+        self.file_path = os.getenv('TRACING_FILE', 'traces.jsonl')
+        # share of new traces kept; a sampled parent from an incoming
+        # traceparent header is always followed
+        self.sample_ratio = float(os.getenv('TRACING_SAMPLE_RATIO', '0.1'))
+        self.excluded_urls = os.getenv('TRACING_EXCLUDED_URLS', 'metrics,debug/profile')
+
+
+# One ExportTraceServiceRequest per line in OTLP JSON, the format the
+# OpenTelemetry Collector's otlpjsonfile receiver reads back.
+class OTLPFileSpanExporter(SpanExporter):
+    def __init__(self, path: str):
+        from google.protobuf.json_format import MessageToDict
+        from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+        self.path = path
+        self._to_dict = lambda spans: MessageToDict(encode_spans(spans))
+        self._lock = threading.Lock()
+
+    # the protobuf JSON mapping writes bytes as base64, OTLP JSON wants ids in hex
+    @staticmethod
+    def _hex_ids(message: dict):
+        for resource in message.get('resourceSpans', []):
+            for scope in resource.get('scopeSpans', []):
+                for span in scope.get('spans', []):
+                    for item in [span, *span.get('links', [])]:
+                        for key in ('traceId', 'spanId', 'parentSpanId'):
+                            if key in item:
+                                item[key] = base64.b64decode(item[key]).hex()
+        return message
+
+    def export(self, spans):
+        line = json.dumps(self._hex_ids(self._to_dict(spans)))
+        with self._lock, open(self.path, 'a') as f:
+            f.write(line + '\n')
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def create_exporter(settings: TracingSettings):
+    if settings.exporter == 'file':
+        return OTLPFileSpanExporter(settings.file_path)
+    if settings.exporter == 'otlp':
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    return ConsoleSpanExporter()
+
+
+def _instrument(name: str, instrument):
+    try:
+        instrument()
+    except ImportError:
+        logger.info('%s instrumentation is not installed, not traced', name)
+
+
+# Opt-in with TRACING=1; otherwise, or without opentelemetry-sdk, nothing is
+# patched and there is no overhead. Traces the app's requests, every
+# phase() block (such as the sqlite calls in db-caching) and, where the
+# instrumentation packages are installed, every Redis command, SQLAlchemy
+# statement (pass the engine) and outgoing httpx request, which also carries
+# the traceparent header on to the upstream service. Spans are exported from
+# a background thread in batches.
+#
+#   setup_tracing(app, 'db-caching')
+def setup_tracing(app: FastAPI, service_name: str, settings: TracingSettings = None, sqlalchemy_engine=None):
+    settings = settings or TracingSettings()
+    if not settings.enabled:
+        return None
+    if trace is None:
+        logger.warning('TRACING=1 but opentelemetry-sdk is not installed')
+        return None
+
+    provider = TracerProvider(
+        resource=Resource.create({'service.name': settings.service_name or service_name}),
+        sampler=ParentBased(TraceIdRatioBased(settings.sample_ratio))
+    )
+    provider.add_span_processor(BatchSpanProcessor(create_exporter(settings)))
+    # for spans started by hand with trace.get_tracer(__name__)
+    trace.set_tracer_provider(provider)
+
+    def fastapi():
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+        # no extra span per ASGI receive/send message
+        FastAPIInstrumentor.instrument_app(
+            app,
+            tracer_provider=provider,
+            excluded_urls=settings.excluded_urls,
+            exclude_spans=['receive', 'send']
+        )
+
+    def redis():
+        from opentelemetry.instrumentation.redis import RedisInstrumentor
+        RedisInstrumentor().instrument(tracer_provider=provider)
+
+    def httpx():
+        from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+        HTTPXClientInstrumentor().instrument(tracer_provider=provider)
+
+    def sqlalchemy():
+        from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+        SQLAlchemyInstrumentor().instrument(engine=sqlalchemy_engine, tracer_provider=provider)
+
+    for name, instrument in (('fastapi', fastapi), ('redis', redis), ('httpx', httpx)):
+        _instrument(name, instrument)
+    if sqlalchemy_engine is not None:
+        _instrument('sqlalchemy', sqlalchemy)
+    trace_phases(provider.get_tracer('perfkit.server_timing'))
+
+    return provider
@@ -0,0 +1,62 @@
+import re
+import time
+import asyncio
+import logging
+from collections import Counter
+from prometheus_client import Counter as PromCounter, Gauge
+
+logger = logging.getLogger('perfkit.warmup')
+
+WARMUP_KEYS = PromCounter('cache_warmup_keys_total', 'Keys written by the startup warm-up', ['namespace'])
+WARMUP_PROGRESS = Gauge('cache_warmup_progress_ratio', 'Share of the hot-key list warmed so far', ['namespace'], multiprocess_mode='max')
+WARMUP_DURATION = Gauge('cache_warmup_duration_seconds', 'Time the last warm-up took to finish', ['namespace'], multiprocess_mode='max')
+
+
+# top_n most frequent ids in a log; pattern must have one capture group
+def hot_keys_from_log(path: str, pattern: str, top_n: int = 1000):
+    regex = re.compile(pattern)
+    counts = Counter()
+    try:
+        with open(path) as f:
+            for line in f:
+                counts.update(regex.findall(line))
+    except FileNotFoundError:
+        logger.info('No access log at %s, nothing to warm', path)
+        return []
+    return [key for key, _ in counts.most_common(top_n)]
+
+
+# Preload items in batches: build(batch) turns inputs into (key, value)
+# pairs, write(pairs) stores them in one pipelined round-trip. At most
+# `concurrency` batches are in flight so the source and Redis are not flooded
+# while the app is still starting.
+async def warm_up(namespace: str, items, build, write, batch_size: int = 500, concurrency: int = 4):
+    items = list(items)
+    total = len(items)
+    progress = WARMUP_PROGRESS.labels(namespace)
+    if not total:
+        progress.set(1)
+        return 0
+    progress.set(0)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    done = written = 0
+    start = time.perf_counter()
+
+    async def run(batch):
+        nonlocal done, written
+        async with semaphore:
+            pairs = await build(batch)
+            await write(pairs)
+        done += len(batch)
+        written += len(pairs)
+        WARMUP_KEYS.labels(namespace).inc(len(pairs))
+        progress.set(done / total)
+        logger.info('Warm-up %s: %d/%d', namespace, done, total)
+
+    await asyncio.gather(*(run(items[i:i + batch_size]) for i in range(0, total, batch_size)))
+
+    elapsed = time.perf_counter() - start
+    WARMUP_DURATION.labels(namespace).set(elapsed)
+    logger.info('Warm-up %s finished: %d keys in %.2fs', namespace, written, elapsed)
+    return written
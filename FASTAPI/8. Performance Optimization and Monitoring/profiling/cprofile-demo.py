@@ -1,32 +1,50 @@
 import os
-import time
+import sys
+import asyncio
 import cProfile
 import datetime
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Depends
 from fastapi.responses import JSONResponse
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from perfkit.sampling_profiler import SamplingProfilerMiddleware
+from perfkit.loop_monitor import LoopLagMiddleware
+from perfkit.cpu_pool import cpu_pool_lifespan, run_cpu_bound
+from perfkit.compute import compute as sum_doubles
+
+# sampling (default): cheap enough to leave on, read it (started with
+# ADMIN_TOKEN=secret) with
+#   curl -H 'X-Admin-Token: secret' 'localhost:8000/debug/profile?seconds=30' > out.collapsed
+#   curl -H 'X-Admin-Token: secret' 'localhost:8000/debug/profile?seconds=30&format=speedscope' > out.speedscope.json
+# cprofile: one deterministic .prof per request, for a short local session only
+PROFILE_MODE = os.getenv('PROFILE_MODE', 'sampling')
 PROFILES_DIR = 'profiles'
-os.makedirs(PROFILES_DIR, exist_ok=True)
 
-app = FastAPI()
+app = FastAPI(lifespan=cpu_pool_lifespan)
+app.add_middleware(LoopLagMiddleware)
 
+if PROFILE_MODE == 'cprofile':
+    os.makedirs(PROFILES_DIR, exist_ok=True)
 
-@app.middleware('http')
-async def create_profile(request: Request, call_next):
-    time_stamp = datetime.datetime.now().strftime('%m_%d_%Y_%H_%M_%S_%f')
-    path = request.url.path.strip('/').replace('/', '_') or 'root'
-    profile_name = os.path.join(PROFILES_DIR, f'{path}_{time_stamp}.prof')
+    @app.middleware('http')
+    async def create_profile(request: Request, call_next):
+        time_stamp = datetime.datetime.now().strftime('%m_%d_%Y_%H_%M_%S_%f')
+        path = request.url.path.strip('/').replace('/', '_') or 'root'
+        profile_name = os.path.join(PROFILES_DIR, f'{path}_{time_stamp}.prof')
 
-    profiler = cProfile.Profile()
-    profiler.enable()
+        profiler = cProfile.Profile()
+        profiler.enable()
 
-    response = await call_next(request)
+        response = await call_next(request)
 
-    profiler.disable()
-    profiler.dump_stats(profile_name)
+        profiler.disable()
+        profiler.dump_stats(profile_name)
 
-    print(f'Profile saved: {profile_name}')
-    return response
+        print(f'Profile saved: {profile_name}')
+        return response
+else:
+    app.add_middleware(SamplingProfilerMiddleware)
 
 
 @app.get('/')
@@ -34,8 +52,13 @@ def home():
     return {'message': 'cProfile demo'}
 
 
+# The wait stands in for I/O and stays in this request, where it holds no
+# pool worker. Only the CPU part goes to a worker process, which keeps the
+# event loop free, but the in-process profilers (the sampler and cprofile
+# alike) never see what runs there.
 @app.get('/compute')
-async def compute():
-    time.sleep(1)
-    result = sum((i * 2) for i in range(10000))
-    return JSONResponse({'result': result})
\ No newline at end of file
+async def compute(run_cpu_bound=Depends(run_cpu_bound)):
+    await asyncio.sleep(1)
+    result = await run_cpu_bound(sum_doubles, 10000)
+    return JSONResponse({'result': result})
+
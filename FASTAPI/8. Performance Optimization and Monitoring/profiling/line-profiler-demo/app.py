@@ -1,14 +1,28 @@
-import time
-from fastapi import FastAPI
+import os
+import sys
+import asyncio
+from fastapi import FastAPI, Depends, HTTPException, Request
 
-app = FastAPI()
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
+from perfkit.line_profiling import profile, router as line_profile_router
+from perfkit.cpu_pool import cpu_pool_lifespan, run_cpu_bound
+from perfkit.compute import BACKENDS, MAX_VECTOR_N, closed_form, slices, chunk_sum
 
+app = FastAPI(lifespan=cpu_pool_lifespan)
+# LINE_PROFILE=computation uvicorn app:app, or at runtime after starting it
+# with ADMIN_TOKEN=secret:
+#   curl -X POST -H 'X-Admin-Token: secret' localhost:8000/admin/line-profile/computation
+#   curl 'localhost:8000/profiling/loop?a=100000'
+#   curl -H 'X-Admin-Token: secret' localhost:8000/admin/line-profile/computation/results
+app.include_router(line_profile_router)
+
+
+@profile
 def computation(n: int):
     res = 0
     for i in range(n):
         res += (i * 2)
-    time.sleep(1)
     return res
 
 
@@ -17,6 +31,32 @@ def process_data(x: int):
     return computation(x)
 
 
+# same result as computation(a), from the closed form unless another
+# backend is asked for
 @app.get('/profiling')
-def profiling(a: int):
-    return {'result': process_data(a)}
\ No newline at end of file
+async def profiling(request: Request, a: int, backend: str = 'closed_form', run_cpu_bound=Depends(run_cpu_bound)):
+    if backend not in BACKENDS:
+        raise HTTPException(status_code=400, detail=f'Unknown backend, pick one of {", ".join(BACKENDS)}')
+    if backend in ('numpy', 'parallel') and a > MAX_VECTOR_N:
+        raise HTTPException(status_code=400, detail=f'a above {MAX_VECTOR_N} overflows the {backend} backend')
+
+    if backend == 'closed_form':
+        result = closed_form(a)
+    elif backend == 'parallel':
+        # one slice per CPU pool worker, each task under the pool's queue limit
+        workers = request.app.state.cpu_pool.settings.workers
+        parts = await asyncio.gather(*(run_cpu_bound(chunk_sum, lo, hi) for lo, hi in slices(a, workers)))
+        result = sum(parts)
+    else:
+        result = await run_cpu_bound(BACKENDS[backend], a)
+    return {'result': result, 'backend': backend}
+
+
+# the original loop, kept to line-profile; it runs in the CPU pool, or in a
+# thread of this process while line profiling is enabled. The wait stands in
+# for I/O and stays here, where it holds no pool worker.
+@app.get('/profiling/loop')
+async def profiling_loop(a: int, run_cpu_bound=Depends(run_cpu_bound)):
+    await asyncio.sleep(1)
+    return {'result': await run_cpu_bound(process_data, a)}
+
@@ -1,4 +1,7 @@
+# kernprof -l -v profiling_test.py   (or python profiling_test.py, where
+# @profile is a no-op)
 from app import process_data
+from perfkit.line_profiling import profile
 
 
 @profile
@@ -7,4 +10,4 @@ def run():
 
 
 if __name__ == '__main__':
-    run()
\ No newline at end of file
+    run()
@@ -1,24 +1,26 @@
+import os
+import sys
 import time
 import logging
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from perfkit.loop_monitor import LoopLagMiddleware
+from perfkit.server_timing import ServerTimingMiddleware
 
 logging.basicConfig(
     level=logging.INFO,
     format="[%(asctime)s] (line %(lineno)d) - %(levelname)s - %(message)s",
     datefmt="%m-%d-%Y %H:%M:%S"
 )
-logger = logging.getLogger('profiler')
 
 app = FastAPI()
-
-
-@app.middleware('http')
-async def add_timing(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    time_taken = time.time() - start_time
-    logger.info(f"Request to {request.url.path} took {time_taken:.3f} seconds")
-    return response
+# /slow calls time.sleep inside async def and gets reported for it
+app.add_middleware(LoopLagMiddleware)
+# every response carries its duration, e.g. `curl -i localhost:8000/fast`
+#   server-timing: app;dur=0.412
+app.add_middleware(ServerTimingMiddleware)
 
 
 @app.get('/')
@@ -1,9 +1,16 @@
+import os
+import sys
 from fastapi import FastAPI
-from prometheus_fastapi_instrumentator import Instrumentator
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from perfkit.loop_monitor import LoopLagMiddleware
+from perfkit.http_metrics import http_instrumentator
 
 app = FastAPI()
+app.add_middleware(LoopLagMiddleware)
 
-Instrumentator().instrument(app).expose(app)
+http_instrumentator().instrument(app).expose(app)
 
 
 @app.get('/home')
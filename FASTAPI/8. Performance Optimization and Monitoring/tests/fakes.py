@@ -0,0 +1,233 @@
+import os
+import sys
+import threading
+import importlib.util
+from redis.exceptions import ConnectionError
+
+
+# every caching app is a main.py; each is loaded under a name of its own
+# (db_caching_main, ...) so their suites can run in one session
+def load_main(test_file):
+    here = os.path.dirname(os.path.abspath(test_file))
+    name = os.path.basename(here).replace('-', '_') + '_main'
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(here, 'main.py'))
+        sys.modules[name] = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(sys.modules[name])
+    return sys.modules[name]
+
+
+# queued commands run against the client on execute(), which counts as one
+# call (and fails as one) however many commands it carries
+class FakePipeline:
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self.redis_client, name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((command, args, kwargs))
+        return queue
+
+    def reset(self):
+        self.commands = []
+
+    def execute(self):
+        commands, self.commands = self.commands, []
+        self.redis_client._call()
+        self.redis_client.batched = True
+        try:
+            return [command(*args, **kwargs) for command, args, kwargs in commands]
+        finally:
+            self.redis_client.batched = False
+
+
+class FakeAsyncPipeline(FakePipeline):
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.reset()
+
+    async def reset(self):
+        self.commands = []
+
+    async def execute(self):
+        commands, self.commands = self.commands, []
+        self.redis_client._call()
+        self.redis_client.batched = True
+        try:
+            return [await command(*args, **kwargs) for command, args, kwargs in commands]
+        finally:
+            self.redis_client.batched = False
+
+
+class FakePubSub:
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+
+    def subscribe(self, **handlers):
+        self.redis_client._call()
+        self.redis_client.handlers.update(handlers)
+
+    def run_in_thread(self, **kwargs):
+        return self
+
+    def stop(self):
+        pass
+
+
+# in-memory stand-in for the sync redis calls used by perfkit. TTLs are
+# recorded for pttl but never expire anything, published messages reach
+# subscribers straight away. down = True makes every call fail as if the
+# server had gone away, failures = n only the next n.
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.bits = set()
+        self.handlers = {}
+        self.published = []
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.down = False
+        self.failures = 0
+        self.batched = False
+
+    def _call(self):
+        if self.batched:
+            return
+        self.calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('Connection reset by peer')
+        if self.down:
+            raise ConnectionError('Connection refused')
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def pubsub(self, **kwargs):
+        return FakePubSub(self)
+
+    def get(self, key):
+        self._call()
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        self._call()
+        with self.lock:
+            if nx and key in self.data:
+                return None
+            self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+            if ex is None:
+                self.ttls.pop(key, None)
+            else:
+                self.ttls[key] = ex
+            return True
+
+    def setex(self, key, ttl, value):
+        return self.set(key, value, ex=ttl)
+
+    def expire(self, key, ttl):
+        self._call()
+        if key not in self.data:
+            return False
+        self.ttls[key] = ttl
+        return True
+
+    def pttl(self, key):
+        self._call()
+        if key not in self.data:
+            return -2
+        return int(self.ttls[key] * 1000) if key in self.ttls else -1
+
+    def delete(self, *keys):
+        self._call()
+        deleted = 0
+        for key in keys:
+            deleted += self.data.pop(key, None) is not None
+            self.ttls.pop(key, None)
+            self.bits.difference_update({bit for bit in self.bits if bit[0] == key})
+        return deleted
+
+    def exists(self, *keys):
+        self._call()
+        return sum(key in self.data or any(bit_key == key for bit_key, _ in self.bits) for key in keys)
+
+    def setbit(self, key, offset, value):
+        self._call()
+        previous = int((key, offset) in self.bits)
+        if value:
+            self.bits.add((key, offset))
+        else:
+            self.bits.discard((key, offset))
+        return previous
+
+    def getbit(self, key, offset):
+        self._call()
+        return int((key, offset) in self.bits)
+
+    def publish(self, channel, message):
+        self._call()
+        self.published.append((channel, message))
+        handler = self.handlers.get(channel)
+        if handler is not None:
+            handler({'data': message.encode()})
+        return int(handler is not None)
+
+    def flushall(self):
+        self.data.clear()
+        self.ttls.clear()
+        self.bits.clear()
+
+
+# in-memory stand-in for the redis.asyncio calls used by perfkit; set
+# down = True to make every call fail as if the server had gone away
+class FakeAsyncRedis:
+    def __init__(self):
+        self.data = {}
+        self.calls = 0
+        self.down = False
+        self.batched = False
+
+    def _call(self):
+        if self.batched:
+            return
+        self.calls += 1
+        if self.down:
+            raise ConnectionError('Connection refused')
+
+    def pipeline(self, transaction=True):
+        return FakeAsyncPipeline(self)
+
+    async def get(self, key):
+        self._call()
+        return self.data.get(key)
+
+    async def mget(self, keys):
+        self._call()
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None, px=None, nx=False):
+        self._call()
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def setex(self, key, ttl, value):
+        return await self.set(key, value, ex=ttl)
+
+    async def delete(self, *keys):
+        self._call()
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+    async def eval(self, script, numkeys, key, token):
+        self._call()
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
@@ -0,0 +1,17 @@
+import os
+from fastapi import FastAPI
+from prometheus_client import Gauge
+from prometheus_fastapi_instrumentator import Instrumentator
+
+# served by several gunicorn workers in test_multiprocess.py
+WORKERS_UP = Gauge('test_workers_up', 'Live workers', multiprocess_mode='livesum')
+WORKERS_UP.set(1)
+
+app = FastAPI()
+
+Instrumentator().instrument(app).expose(app)
+
+
+@app.get('/pid')
+def pid():
+    return {'pid': os.getpid()}
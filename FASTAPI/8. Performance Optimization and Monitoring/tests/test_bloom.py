@@ -0,0 +1,54 @@
+from perfkit.bloom import RedisBloomFilter
+from perfkit.circuit_breaker import CircuitBreaker, ResilientRedis
+from tests.fakes import FakeRedis
+
+
+def bloom_filter(redis_client):
+    # failed writes come back empty, as they do through ResilientRedis
+    resilient = ResilientRedis(redis_client, CircuitBreaker('test', failure_threshold=100))
+    return RedisBloomFilter(resilient, 'ids', capacity=1000, error_rate=0.01)
+
+
+def test_added_items_are_always_found():
+    bloom = bloom_filter(FakeRedis())
+    bloom.fill(range(1000), chunk_size=100)
+    assert all(bloom.might_contain(i) for i in range(1000))
+
+
+def test_false_positive_rate_is_close_to_target():
+    bloom = bloom_filter(FakeRedis())
+    bloom.fill(range(1000))
+    false_positives = sum(bloom.might_contain(i) for i in range(10000, 20000))
+    assert false_positives < 300
+
+
+def test_nothing_is_rejected_until_the_full_set_is_loaded():
+    redis_client = FakeRedis()
+    bloom = bloom_filter(redis_client)
+    bloom.fill([1, 2, 3])
+    assert not bloom.might_contain(999)
+
+    # bitmap lost, then a single write recreates it with one id
+    redis_client.flushall()
+    bloom.add(5)
+    assert all(bloom.might_contain(i) for i in (1, 2, 3, 5))
+
+    bloom.fill([1, 2, 3, 5])
+    assert not bloom.might_contain(999)
+
+
+def test_failed_chunk_leaves_the_filter_untrusted():
+    redis_client = FakeRedis()
+    bloom = bloom_filter(redis_client)
+    # the marker delete and the first chunk
+    redis_client.failures = 2
+    assert not bloom.fill(range(1, 25), chunk_size=10)
+    assert all(bloom.might_contain(i) for i in range(1, 11))
+
+    assert bloom.fill(range(1, 25), chunk_size=10)
+    assert not bloom.might_contain(999)
+
+    # a lost add would make its item a trusted "no"
+    redis_client.failures = 1
+    bloom.add(30)
+    assert bloom.might_contain(30)
@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from prometheus_client import REGISTRY
+from perfkit.cache_metrics import CacheMetrics
+from perfkit.circuit_breaker import CircuitBreaker, ResilientAsyncRedis
+from perfkit.swr import SWRCache
+from tests.fakes import FakeAsyncRedis
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_lookups_are_counted_per_namespace_and_tier():
+    metrics = CacheMetrics('test-lookups')
+    metrics.hit('local')
+    metrics.hit(count=3)
+    metrics.miss()
+
+    assert sample('cache_lookups_total', namespace='test-lookups', tier='local', result='hit') == 1
+    assert sample('cache_lookups_total', namespace='test-lookups', tier='redis', result='hit') == 3
+    assert sample('cache_lookups_total', namespace='test-lookups', tier='redis', result='miss') == 1
+
+
+def test_timed_records_latency_and_errors():
+    metrics = CacheMetrics('test-timed')
+    with metrics.timed('get'):
+        pass
+    with pytest.raises(ConnectionError):
+        with metrics.timed('get'):
+            raise ConnectionError()
+
+    assert sample('cache_operation_duration_seconds_count', namespace='test-timed', operation='get') == 2
+    assert sample('cache_errors_total', namespace='test-timed', operation='get') == 1
+
+
+def test_payload_sizes():
+    metrics = CacheMetrics('test-size')
+    metrics.payload('set', b'x' * 100)
+    assert sample('cache_payload_size_bytes_sum', namespace='test-size', operation='set') == 100
+
+
+def test_breaker_fallbacks_are_errors_not_misses():
+    fake = FakeAsyncRedis()
+    fake.down = True
+    client = ResilientAsyncRedis(fake, CircuitBreaker('test', failure_threshold=1, reset_timeout=60))
+    cache = SWRCache(client, metrics=CacheMetrics('test-fallback'), beta=0)
+
+    @cache.cached(key=lambda n: f'double:{n}', soft_ttl=60, hard_ttl=120)
+    async def double(n):
+        return n * 2
+
+    async def scenario():
+        # the first lookup fails, the second is skipped by the open circuit
+        assert await double(1) == 2
+        assert await double(1) == 2
+
+    asyncio.run(scenario())
+    assert sample('cache_errors_total', namespace='test-fallback', operation='get') == 1
+    assert sample('cache_skipped_total', namespace='test-fallback', operation='get') == 1
+    assert sample('cache_operation_duration_seconds_count', namespace='test-fallback', operation='get') == 1
+    assert sample('cache_lookups_total', namespace='test-fallback', tier='redis', result='miss') == 0
@@ -0,0 +1,102 @@
+import asyncio
+from perfkit.circuit_breaker import CircuitBreaker, ResilientAsyncRedis, CLOSED, OPEN, HALF_OPEN
+from perfkit.singleflight import RedisSingleFlight
+from perfkit.swr import SWRCache
+from tests.fakes import FakeAsyncRedis
+
+
+def test_breaker_opens_after_consecutive_failures_and_probes_to_recover():
+    breaker = CircuitBreaker('test', failure_threshold=3, reset_timeout=0)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    # reset_timeout has passed: exactly one probe goes through
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_open_circuit_skips_redis_and_reports_misses():
+    fake = FakeAsyncRedis()
+    fake.down = True
+    client = ResilientAsyncRedis(fake, CircuitBreaker('test', failure_threshold=2, reset_timeout=60))
+
+    async def scenario():
+        assert await client.get('a') is None
+        assert await client.set('a', 1) is None
+        assert await client.mget(['a', 'b', 'c']) == [None, None, None]
+        assert await client.get('a') is None
+
+    asyncio.run(scenario())
+    assert client.breaker.state == OPEN
+    assert fake.calls == 2
+
+
+def test_cache_falls_back_to_the_source_and_recovers():
+    fake = FakeAsyncRedis()
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0.05)
+    client = ResilientAsyncRedis(fake, breaker)
+    cache = SWRCache(client, beta=0)
+    cache.flight = RedisSingleFlight(client, load=cache.peek, lock_ttl=5)
+    computed = []
+
+    @cache.cached(key=lambda n: f'square:{n}', soft_ttl=60, hard_ttl=120)
+    async def square(n):
+        computed.append(n)
+        return n * n
+
+    async def scenario():
+        fake.down = True
+        # no lock can be taken, so this must not wait for the 5s lock TTL
+        assert await asyncio.wait_for(square(3), timeout=1) == 9
+        assert await square(3) == 9
+        assert breaker.state == OPEN
+
+        fake.down = False
+        await asyncio.sleep(0.06)
+        assert await square(3) == 9
+        assert breaker.state == CLOSED
+        assert await square(3) == 9
+
+    asyncio.run(scenario())
+    # twice while down, once to refill after recovery, then a cache hit
+    assert computed == [3, 3, 3]
+
+
+def test_cancelled_probe_frees_the_half_open_slot():
+    fake = FakeAsyncRedis()
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0)
+    client = ResilientAsyncRedis(fake, breaker)
+    breaker.record_failure()
+    started = asyncio.Event()
+
+    async def hang(key):
+        started.set()
+        await asyncio.sleep(60)
+
+    async def scenario():
+        fake.get = hang
+        probe = asyncio.ensure_future(client.get('a'))
+        await started.wait()
+        assert breaker.state == HALF_OPEN
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+
+        # without the release the circuit would short-circuit forever
+        del fake.get
+        await client.set('a', 1)
+        assert breaker.state == CLOSED
+
+    asyncio.run(scenario())
@@ -0,0 +1,23 @@
+import pytest
+from perfkit import compute
+from perfkit.compute import BACKENDS, python_loop, slices, chunk_sum
+
+
+@pytest.mark.parametrize('n', [0, 1, 2, 99, 1000, compute.CHUNK_SIZE + 3])
+def test_backends_agree(n):
+    expected = python_loop(n)
+    for name, fn in BACKENDS.items():
+        assert fn(n) == expected, name
+
+
+def test_parallel_splits_across_workers():
+    n = 3 * compute.CHUNK_SIZE + 7
+    assert compute.parallel(n, workers=2) == python_loop(n)
+
+
+@pytest.mark.parametrize('n, workers', [(0, 4), (5, 8), (1000, 3), (compute.CHUNK_SIZE + 3, 2)])
+def test_slices_cover_the_range_once(n, workers):
+    bounds = slices(n, workers)
+    assert len(bounds) <= workers
+    assert sum(chunk_sum(lo, hi) for lo, hi in bounds) == python_loop(n)
+
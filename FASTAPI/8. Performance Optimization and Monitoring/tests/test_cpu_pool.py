@@ -0,0 +1,69 @@
+import time
+import asyncio
+import httpx
+from fastapi import FastAPI, Depends
+from prometheus_client import REGISTRY
+from perfkit.cpu_pool import CPUPoolSettings, cpu_pool_lifespan, run_cpu_bound
+from perfkit.line_profiling import line_profiling, profile
+
+
+def slow_square(n):
+    time.sleep(0.3)
+    return n * n
+
+
+@profile
+def profiled_square(n):
+    return n * n
+
+
+def make_app(workers, max_queue):
+    settings = CPUPoolSettings()
+    settings.workers, settings.max_queue = workers, max_queue
+
+    app = FastAPI(lifespan=lambda app: cpu_pool_lifespan(app, settings))
+
+    @app.get('/square/{n}')
+    async def square(n: int, run=Depends(run_cpu_bound)):
+        return {'result': await run(slow_square, n)}
+
+    @app.get('/profiled/{n}')
+    async def profiled(n: int, run=Depends(run_cpu_bound)):
+        return {'result': await run(profiled_square, n)}
+
+    return app
+
+
+async def request_all(app, paths):
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await asyncio.gather(*(client.get(path) for path in paths))
+
+
+def test_work_runs_in_worker_processes_in_parallel():
+    start = time.perf_counter()
+    responses = asyncio.run(request_all(make_app(workers=2, max_queue=0), ['/square/3', '/square/4']))
+    assert [r.json()['result'] for r in responses] == [9, 16]
+    # two 0.3s tasks side by side, not one after the other
+    assert time.perf_counter() - start < 0.6 + 0.5
+
+
+def test_full_queue_is_refused_with_retry_after():
+    rejected = REGISTRY.get_sample_value('cpu_pool_rejected_total') or 0
+    responses = asyncio.run(request_all(make_app(workers=1, max_queue=1), ['/square/1'] * 3))
+    statuses = sorted(r.status_code for r in responses)
+    assert statuses == [200, 200, 503]
+    busy = next(r for r in responses if r.status_code == 503)
+    assert busy.headers['Retry-After'] == '1'
+    assert REGISTRY.get_sample_value('cpu_pool_rejected_total') == rejected + 1
+
+
+def test_line_profiled_code_runs_in_process():
+    line_profiling.enable('profiled_square')
+    try:
+        responses = asyncio.run(request_all(make_app(workers=1, max_queue=0), ['/profiled/5']))
+        assert responses[0].json() == {'result': 25}
+        assert 'return n * n' in line_profiling.text('profiled_square')
+    finally:
+        line_profiling.disable('profiled_square')
@@ -0,0 +1,29 @@
+import asyncio
+import httpx
+from prometheus_client import REGISTRY
+from perfkit.http_client import create_http_client, pool_stats, record_pool_stats
+
+
+def test_stats_are_exported_as_gauges():
+    async def scenario():
+        client = create_http_client()
+        try:
+            return record_pool_stats(client)
+        finally:
+            await client.aclose()
+
+    stats = asyncio.run(scenario())
+    assert stats['open_connections'] == 0
+    assert stats['max_connections'] == 100
+    assert REGISTRY.get_sample_value('http_client_pool_connections', {'state': 'active'}) == 0
+    assert REGISTRY.get_sample_value('http_client_pool_requests', {'state': 'waiting'}) == 0
+
+
+def test_unknown_transport_gives_empty_stats():
+    class Transport(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request):
+            return httpx.Response(200)
+
+    client = httpx.AsyncClient(transport=Transport())
+    assert pool_stats(client) == {}
+    assert record_pool_stats(client) == {}
@@ -0,0 +1,89 @@
+import bisect
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from perfkit.http_metrics import http_instrumentator, exponential_buckets, buckets_from_env, LATENCY_BUCKETS
+
+app = FastAPI()
+http_instrumentator().instrument(app).expose(app)
+
+
+@app.get('/employees/{emp_id}')
+def get_employee(emp_id: int):
+    in_flight = REGISTRY.get_sample_value('http_requests_inprogress', {'handler': '/employees/{emp_id}', 'method': 'GET'})
+    return {'id': emp_id, 'in_flight': in_flight}
+
+
+@app.post('/employees')
+def create_employee(body: dict):
+    return body
+
+
+@app.get('/stream')
+def stream():
+    return StreamingResponse(iter([b'a', b'b']))
+
+
+client = TestClient(app)
+
+
+def value(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_labels_use_route_template_and_status_class():
+    before = value('http_requests_total', handler='/employees/{emp_id}', method='GET', status='2xx')
+    for emp_id in range(5):
+        assert client.get(f'/employees/{emp_id}').json()['in_flight'] == 1
+    client.get('/employees/abc')
+    client.get('/no/such/path')
+
+    assert value('http_requests_total', handler='/employees/{emp_id}', method='GET', status='2xx') - before == 5
+    assert value('http_requests_total', handler='/employees/{emp_id}', method='GET', status='4xx') >= 1
+    assert value('http_requests_total', handler='none', method='GET', status='4xx') >= 1
+    assert value('http_requests_inprogress', handler='/employees/{emp_id}', method='GET') == 0
+
+    text = client.get('/metrics').text
+    assert '/employees/1' not in text
+    assert 'status="404"' not in text
+    assert value('http_request_duration_seconds_count', handler='/employees/{emp_id}', method='GET') >= 6
+
+
+def test_sizes_are_recorded():
+    labels = {'handler': '/employees', 'method': 'POST'}
+    before = value('http_request_size_bytes_sum', **labels)
+    client.post('/employees', json={'name': 'x' * 100})
+
+    assert value('http_request_size_bytes_sum', **labels) - before > 100
+    assert value('http_response_size_bytes_sum', **labels) > 100
+    assert value('http_response_size_bytes_bucket', le='64.0', **labels) == 0
+
+    # no Content-Length on a streamed response
+    client.get('/stream')
+    assert value('http_response_size_bytes_count', handler='/stream', method='GET') == 1
+
+
+def test_buckets_resolve_single_milliseconds():
+    assert exponential_buckets(1, 2, 4) == (1, 2, 4, 8)
+    slots = {bisect.bisect_left(LATENCY_BUCKETS, ms / 1000) for ms in (2, 3, 5, 8)}
+    assert len(slots) == 4
+    assert LATENCY_BUCKETS[-1] > 10
+
+
+def test_buckets_from_env(monkeypatch):
+    monkeypatch.setenv('TEST_BUCKETS', '0.5,0.01,0.1')
+    assert buckets_from_env('TEST_BUCKETS', (1.0,)) == (0.01, 0.1, 0.5)
+    assert buckets_from_env('UNSET_BUCKETS', (1.0,)) == (1.0,)
+
+
+def test_apps_in_one_process_share_the_in_progress_gauge():
+    other = FastAPI()
+    http_instrumentator().instrument(other)
+
+    @other.get('/other')
+    def handler():
+        return REGISTRY.get_sample_value('http_requests_inprogress', {'handler': '/other', 'method': 'GET'})
+
+    assert TestClient(other).get('/other').json() == 1
+    assert client.get('/employees/1').json()['in_flight'] == 1
@@ -0,0 +1,14 @@
+import pytest
+from perfkit.keys import FloatVectorKey, int_key, HASHERS
+
+
+def test_int_keys_are_readable():
+    assert int_key('user', 42) == 'user:42'
+
+
+@pytest.mark.parametrize('hasher', sorted(HASHERS))
+def test_float_vector_keys_are_stable_and_distinct(hasher):
+    key = FloatVectorKey('predict', 4, hasher)
+    assert key([5.1, 3.5, 1.4, 0.2]) == key([5.1, 3.5, 1.4, 0.2])
+    assert key([5.1, 3.5, 1.4, 0.2]) != key([5.1, 3.5, 1.4, 0.3])
+    assert key([5.1, 3.5, 1.4, 0.2]).startswith('predict:')
@@ -0,0 +1,76 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from perfkit import admin, line_profiling as module
+from perfkit.line_profiling import LineProfiling
+
+
+def hot_loop(n):
+    total = 0
+    for i in range(n):
+        total += i * 2
+    return total
+
+
+def test_profile_is_a_pass_through_until_enabled():
+    profiling = LineProfiling(enabled='')
+    fn = profiling.profile(hot_loop)
+    assert fn(10) == 90
+    assert not profiling.is_enabled('hot_loop')
+    with pytest.raises(KeyError):
+        profiling.text('hot_loop')
+
+    profiling.enable('hot_loop')
+    assert fn(1000) == 999000
+    assert 'total += i * 2' in profiling.text('hot_loop')
+
+    # stats survive a disable, reset clears them
+    profiling.disable('hot_loop')
+    fn(10)
+    assert '1000' in profiling.text('hot_loop')
+    profiling.reset('hot_loop')
+    with pytest.raises(KeyError):
+        profiling.text('hot_loop')
+
+
+def test_env_var_enables_functions_at_import():
+    profiling = LineProfiling(enabled='other, hot_loop')
+    profiling.profile(hot_loop)(5)
+    assert profiling.is_enabled('hot_loop')
+
+
+def test_admin_endpoints_toggle_and_download(monkeypatch):
+    profiling = LineProfiling(enabled='')
+    monkeypatch.setattr(module, 'line_profiling', profiling)
+    monkeypatch.setattr(admin, 'ADMIN_TOKEN', 'secret')
+    fn = profiling.profile(hot_loop)
+
+    app = FastAPI()
+    app.include_router(module.router)
+    client = TestClient(app, headers={'X-Admin-Token': 'secret'})
+
+    assert client.get('/admin/line-profile', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    assert client.get('/admin/line-profile').json() == {'hot_loop': False}
+    assert client.get('/admin/line-profile/hot_loop/results').status_code == 404
+    assert client.post('/admin/line-profile/missing').status_code == 404
+
+    assert client.post('/admin/line-profile/hot_loop').json()['enabled']
+    fn(100)
+    text = client.get('/admin/line-profile/hot_loop/results')
+    assert 'total += i * 2' in text.text
+
+    download = client.get('/admin/line-profile/hot_loop/results', params={'format': 'lprof'})
+    assert download.headers['content-disposition'] == 'attachment; filename="hot_loop.lprof"'
+    assert len(download.content) > 0
+
+    assert client.delete('/admin/line-profile/hot_loop').json() == {'name': 'hot_loop', 'enabled': False}
+
+
+def test_admin_endpoints_are_closed_without_a_token(monkeypatch):
+    monkeypatch.setattr(admin, 'ADMIN_TOKEN', None)
+    app = FastAPI()
+    app.include_router(module.router)
+    client = TestClient(app)
+
+    assert client.get('/admin/line-profile').status_code == 403
+    assert client.get('/admin/line-profile', headers={'X-Admin-Token': ''}).status_code == 403
@@ -0,0 +1,74 @@
+import json
+import time
+from perfkit.local_cache import LocalCache, TwoTierCache
+from tests.fakes import FakeRedis
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LocalCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+
+
+def test_entries_expire():
+    cache = LocalCache(maxsize=2, ttl=0.01)
+    cache.set('a', 1)
+    time.sleep(0.02)
+    assert cache.get('a') is None
+
+
+def test_local_tier_saves_redis_round_trips():
+    redis_client = FakeRedis()
+    redis_client.data['user:1'] = json.dumps({'id': 1}).encode()
+    cache = TwoTierCache(redis_client, LocalCache(maxsize=8, ttl=60))
+
+    for _ in range(5):
+        assert cache.get('user:1') == {'id': 1}
+
+    stats = cache.stats()
+    assert redis_client.calls == 1
+    assert stats['redis_hits'] == 1
+    assert stats['local_hits'] == 4
+    assert stats['redis_round_trips_saved'] == 4
+
+
+def test_short_ttl_is_not_stretched_by_the_local_tier():
+    redis_client = FakeRedis()
+    cache = TwoTierCache(redis_client, LocalCache(maxsize=8, ttl=60))
+    cache.set('user:404', {'message': 'User not found.'}, 0.01)
+    cache.set('user:1', {'id': 1}, 3600)
+
+    time.sleep(0.02)
+    assert cache.local.get('user:404') is None
+    assert cache.local.get('user:1') == {'id': 1}
+
+
+def test_redis_hit_is_kept_locally_only_while_redis_keeps_it():
+    redis_client = FakeRedis()
+    writer = TwoTierCache(redis_client, LocalCache(maxsize=8, ttl=60))
+    writer.set('user:404', {'message': 'User not found.'}, 0.01)
+
+    # another worker reads the short-lived entry from Redis
+    reader = TwoTierCache(redis_client, LocalCache(maxsize=8, ttl=60))
+    assert reader.get('user:404') == {'message': 'User not found.'}
+    time.sleep(0.02)
+    assert reader.local.get('user:404') is None
+
+
+def test_invalidation_message_drops_local_entry():
+    redis_client = FakeRedis()
+    cache = TwoTierCache(redis_client, LocalCache(maxsize=8, ttl=60))
+    cache.set('user:1', {'id': 1}, 3600)
+
+    cache.invalidate('user:1')
+    assert redis_client.published == [(cache.channel, 'user:1')]
+
+    cache.local.set('user:2', {'id': 2})
+    cache._on_invalidate({'data': b'user:2'})
+    assert cache.local.get('user:2') is None
+    assert cache.stats()['invalidations_received'] == 1
@@ -0,0 +1,49 @@
+import time
+import logging
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from perfkit.loop_monitor import LoopLagMiddleware
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(LoopLagMiddleware, threshold=0.1, interval=0.01)
+
+    @app.get('/blocking')
+    async def blocking_endpoint():
+        time.sleep(0.4)
+        return {}
+
+    @app.get('/fine')
+    async def fine_endpoint():
+        return {}
+
+    return app
+
+
+def blocked(route):
+    return REGISTRY.get_sample_value('event_loop_blocked_total', {'route': route}) or 0
+
+
+def test_blocking_call_in_async_endpoint_is_reported(caplog):
+    caplog.set_level(logging.WARNING, logger='perfkit.loop_monitor')
+    lag_before = REGISTRY.get_sample_value('event_loop_lag_seconds_bucket', {'le': '0.25'}) or 0
+    lag_total_before = REGISTRY.get_sample_value('event_loop_lag_seconds_count') or 0
+
+    with TestClient(make_app()) as client:
+        client.get('/fine')
+        time.sleep(0.05)
+        assert blocked('/blocking') == 0
+        client.get('/blocking')
+        time.sleep(0.05)
+
+    assert blocked('/blocking') == 1
+    message = next(record.getMessage() for record in caplog.records if 'blocked' in record.getMessage())
+    assert 'route /blocking' in message
+    assert 'time.sleep(0.4)' in message
+
+    # the stalled heartbeat lands in the lag histogram above 0.25s
+    lag_total = REGISTRY.get_sample_value('event_loop_lag_seconds_count')
+    lag_fast = REGISTRY.get_sample_value('event_loop_lag_seconds_bucket', {'le': '0.25'})
+    assert lag_total - lag_total_before > lag_fast - lag_before
@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+import signal
+import socket
+import subprocess
+import httpx
+import pytest
+from prometheus_client.parser import text_string_to_metric_families
+
+pytest.importorskip('gunicorn')
+pytest.importorskip('uvicorn_worker')
+
+SECTION = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKERS = 3
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def samples(text, name, **labels):
+    return [
+        sample.value
+        for family in text_string_to_metric_families(text)
+        for sample in family.samples
+        if sample.name == name and all(sample.labels.get(k) == v for k, v in labels.items())
+    ]
+
+
+@pytest.fixture
+def server(tmp_path):
+    port = free_port()
+    env = {
+        **os.environ,
+        'PROMETHEUS_MULTIPROC_DIR': str(tmp_path),
+        'WEB_CONCURRENCY': str(WORKERS),
+        'BIND': f'127.0.0.1:{port}'
+    }
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--chdir', 'tests', 'multiprocess_app:app'],
+        cwd=SECTION, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        wait_for_workers(base_url, WORKERS)
+        yield base_url
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=10)
+
+
+def live_workers(base_url):
+    return samples(httpx.get(f'{base_url}/metrics').text, 'test_workers_up')
+
+
+def wait_for_workers(base_url, count, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if live_workers(base_url) == [count]:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError(f'{count} workers did not come up')
+
+
+def requests_counted(base_url):
+    return samples(httpx.get(f'{base_url}/metrics').text, 'http_requests_total', handler='/pid', status='2xx')
+
+
+# a worker counts a request just after sending the response
+def wait_for_count(base_url, count, timeout=5):
+    deadline = time.monotonic() + timeout
+    while requests_counted(base_url) != [count] and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+def test_counters_sum_across_workers(server):
+    pids = set()
+    # a new connection per request lets every worker take some
+    for _ in range(90):
+        pids.add(httpx.get(f'{server}/pid').json()['pid'])
+    assert len(pids) > 1
+
+    wait_for_count(server, 90)
+    # every scrape gets the total, whichever worker answers it
+    for _ in range(WORKERS):
+        assert requests_counted(server) == [90]
+
+
+def test_dead_worker_keeps_its_counts_but_not_its_gauges(server):
+    pids = {httpx.get(f'{server}/pid').json()['pid'] for _ in range(30)}
+    wait_for_count(server, 30)
+
+    os.kill(pids.pop(), signal.SIGKILL)
+    # gunicorn replaces the worker; without child_exit the dead one's gauge
+    # would still be counted
+    time.sleep(1)
+    wait_for_workers(server, WORKERS)
+
+    assert requests_counted(server) == [30]
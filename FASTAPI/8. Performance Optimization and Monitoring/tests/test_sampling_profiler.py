@@ -0,0 +1,101 @@
+import time
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from perfkit import admin
+from perfkit.sampling_profiler import SamplingProfilerMiddleware
+
+
+@pytest.fixture(autouse=True)
+def admin_token(monkeypatch):
+    monkeypatch.setattr(admin, 'ADMIN_TOKEN', 'secret')
+
+
+def busy(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(SamplingProfilerMiddleware, hz=200, always_on=False)
+
+    @app.get('/busy')
+    async def busy_async():
+        await asyncio.sleep(0.05)
+        busy(0.3)
+        return {}
+
+    @app.get('/busy-sync')
+    def busy_sync():
+        busy(0.3)
+        return {}
+
+    @app.get('/idle')
+    async def idle():
+        return {}
+
+    return app
+
+
+async def profile_while(client, params, *paths):
+    profile = asyncio.ensure_future(client.get('/debug/profile', params=params, headers={'X-Admin-Token': 'secret'}))
+    await asyncio.gather(*(client.get(path) for path in paths))
+    return await profile
+
+
+def test_samples_are_attributed_to_routes():
+    async def scenario():
+        transport = httpx.ASGITransport(app=make_app())
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            await client.get('/idle')
+            return await profile_while(client, {'seconds': 0.5}, '/busy', '/busy-sync')
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 200
+    counts = {}
+    for line in response.text.splitlines():
+        stack, count = line.rsplit(' ', 1)
+        route = stack.split(';')[0]
+        counts[route] = counts.get(route, 0) + int(count)
+        if route in ('/busy', '/busy-sync'):
+            assert 'busy (test_sampling_profiler.py' in stack
+    assert counts.get('/busy', 0) > 10
+    assert counts.get('/busy-sync', 0) > 10
+    assert '/idle' not in counts
+
+
+def test_speedscope_output_and_validation():
+    async def scenario():
+        transport = httpx.ASGITransport(app=make_app())
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            await client.get('/idle')
+            bad = await client.get('/debug/profile', params={'seconds': 'x'}, headers={'X-Admin-Token': 'secret'})
+            good = await profile_while(client, {'seconds': 0.3, 'format': 'speedscope'}, '/busy')
+            return bad, good
+
+    bad, good = asyncio.run(scenario())
+    assert bad.status_code == 400
+    data = good.json()
+    assert [profile['name'] for profile in data['profiles']] == ['/busy']
+    profile = data['profiles'][0]
+    assert len(profile['samples']) == len(profile['weights'])
+    assert all(index < len(data['shared']['frames']) for sample in profile['samples'] for index in sample)
+    # sampled at twice the default rate here
+    assert float(good.headers['X-Profiler-Overhead']) < 0.05
+
+
+def test_profile_requires_the_admin_token(monkeypatch):
+    async def scenario():
+        transport = httpx.ASGITransport(app=make_app())
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            wrong = await client.get('/debug/profile', params={'seconds': 0}, headers={'X-Admin-Token': 'wrong'})
+            monkeypatch.setattr(admin, 'ADMIN_TOKEN', None)
+            unset = await client.get('/debug/profile', params={'seconds': 0}, headers={'X-Admin-Token': 'secret'})
+            return wrong, unset
+
+    wrong, unset = asyncio.run(scenario())
+    assert wrong.status_code == 403
+    assert unset.status_code == 403
@@ -0,0 +1,37 @@
+import json
+import pytest
+from perfkit.serializers import Serializer, MAGIC, FLAG_ZSTD
+
+POST = {'userId': 1, 'id': 1, 'title': 'sunt aut facere', 'body': 'quia et suscipit ' * 10}
+
+
+@pytest.mark.parametrize('codec', ['json', 'orjson', 'msgpack'])
+def test_round_trip(codec):
+    serializer = Serializer(codec)
+    data = serializer.dumps(POST)
+    assert data[0] == MAGIC
+    assert serializer.loads(data) == POST
+
+
+def test_large_payloads_are_compressed():
+    serializer = Serializer('orjson', compress_threshold=256)
+    data = serializer.dumps([POST] * 20)
+    assert data[3] & FLAG_ZSTD
+    assert len(data) < len(json.dumps([POST] * 20))
+    assert serializer.loads(data) == [POST] * 20
+
+
+def test_reads_payloads_written_with_another_codec():
+    data = Serializer('msgpack').dumps(POST)
+    assert Serializer('orjson').loads(data) == POST
+
+
+def test_reads_legacy_plain_json():
+    assert Serializer('msgpack').loads(json.dumps(POST).encode()) == POST
+
+
+def test_rejects_unknown_version():
+    data = bytearray(Serializer('json').dumps(POST))
+    data[1] = 99
+    with pytest.raises(ValueError):
+        Serializer('json').loads(bytes(data))
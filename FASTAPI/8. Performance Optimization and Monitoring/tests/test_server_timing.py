@@ -0,0 +1,66 @@
+import time
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from perfkit.server_timing import ServerTimingMiddleware, RouteHistogram, phase
+
+
+def parse(header):
+    return {
+        name: float(duration.split('=')[1])
+        for name, duration in (part.strip().split(';') for part in header.split(','))
+    }
+
+
+def make_app(histogram):
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware, histogram=histogram)
+
+    @app.get('/users/{user_id}')
+    def get_user(user_id: int):
+        # sync endpoint: runs in the threadpool
+        with phase('cache'):
+            time.sleep(0.01)
+        with phase('db'):
+            time.sleep(0.02)
+        return {'id': user_id}
+
+    @app.get('/stream')
+    def stream():
+        return StreamingResponse(iter([b'a', b'b', b'c']))
+
+    return app
+
+
+def test_header_breaks_request_into_phases():
+    histogram = RouteHistogram('test_route_duration_seconds', 'test')
+    client = TestClient(make_app(histogram))
+
+    timing = parse(client.get('/users/1').headers['server-timing'])
+    assert set(timing) == {'cache', 'db', 'app'}
+    assert timing['db'] >= 20
+    assert timing['app'] >= timing['db'] + timing['cache']
+
+    response = client.get('/stream')
+    assert response.content == b'abc'
+    assert 'server-timing' in response.headers
+
+
+def test_latency_is_collected_per_route_template():
+    histogram = RouteHistogram('test_route_duration_seconds', 'test')
+    client = TestClient(make_app(histogram))
+    for user_id in range(3):
+        client.get(f'/users/{user_id}')
+    client.get('/missing')
+
+    REGISTRY.register(histogram)
+    try:
+        count = REGISTRY.get_sample_value('test_route_duration_seconds_count', {'route': '/users/{user_id}'})
+        fast = REGISTRY.get_sample_value('test_route_duration_seconds_bucket', {'route': '/users/{user_id}', 'le': '0.008'})
+        unmatched = REGISTRY.get_sample_value('test_route_duration_seconds_count', {'route': 'unmatched'})
+    finally:
+        REGISTRY.unregister(histogram)
+    assert count == 3
+    assert fast == 0
+    assert unmatched == 1
@@ -0,0 +1,48 @@
+import asyncio
+from perfkit.singleflight import SingleFlight, RedisSingleFlight
+from tests.fakes import FakeAsyncRedis
+
+
+def test_single_flight_shares_one_call():
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return 'value'
+
+    async def run():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do('k', fetch) for _ in range(10)))
+        return results, flight.in_flight()
+
+    results, in_flight = asyncio.run(run())
+    assert calls == 1
+    assert results == ['value'] * 10
+    assert in_flight == 0
+
+
+def test_redis_single_flight_coordinates_workers():
+    redis_client = FakeAsyncRedis()
+    calls = 0
+
+    async def load(key):
+        return redis_client.data.get(f'cache:{key}')
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        redis_client.data['cache:k'] = 'value'
+        return 'value'
+
+    async def run():
+        # one instance per simulated worker, all sharing the same Redis
+        workers = [RedisSingleFlight(redis_client, load=load, poll_interval=0.01) for _ in range(4)]
+        return await asyncio.gather(*(w.do('k', fetch) for w in workers for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert calls == 1
+    assert results == ['value'] * 20
+    assert 'lock:k' not in redis_client.data
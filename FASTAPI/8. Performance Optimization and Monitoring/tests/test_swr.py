@@ -0,0 +1,70 @@
+import asyncio
+from perfkit.swr import SWRCache
+from tests.fakes import FakeAsyncRedis
+
+
+def make_cached(cache, soft_ttl, hard_ttl=60):
+    calls = []
+
+    @cache.cached(key=lambda n: f'square:{n}', soft_ttl=soft_ttl, hard_ttl=hard_ttl)
+    async def square(n):
+        calls.append(n)
+        await asyncio.sleep(0.01)
+        return n * n
+
+    return square, calls
+
+
+def test_fresh_entry_is_served_without_recompute():
+    cache = SWRCache(FakeAsyncRedis(), beta=0)
+    square, calls = make_cached(cache, soft_ttl=60)
+
+    async def run():
+        return [await square(3) for _ in range(5)]
+
+    assert asyncio.run(run()) == [9] * 5
+    assert calls == [3]
+
+
+def test_concurrent_misses_compute_once():
+    cache = SWRCache(FakeAsyncRedis(), beta=0)
+    square, calls = make_cached(cache, soft_ttl=60)
+
+    async def run():
+        return await asyncio.gather(*(square(4) for _ in range(10)))
+
+    assert asyncio.run(run()) == [16] * 10
+    assert calls == [4]
+
+
+def test_stale_entry_is_served_while_refreshed_once():
+    redis_client = FakeAsyncRedis()
+    cache = SWRCache(redis_client, beta=0)
+    square, calls = make_cached(cache, soft_ttl=0.05)
+
+    async def run():
+        await square(5)
+        await asyncio.sleep(0.06)
+        # every stale read returns immediately, only one refresh is started
+        stale = await asyncio.gather(*(square(5) for _ in range(10)))
+        await asyncio.sleep(0.05)
+        return stale
+
+    assert asyncio.run(run()) == [25] * 10
+    assert calls == [5, 5]
+    assert 'square:5:refresh' in redis_client.data
+
+
+def test_xfetch_refreshes_before_soft_expiry():
+    cache = SWRCache(FakeAsyncRedis(), beta=1e9)
+    square, calls = make_cached(cache, soft_ttl=60)
+
+    async def run():
+        await square(6)
+        value = await square(6)
+        await asyncio.sleep(0.05)
+        return value
+
+    # a huge beta makes an early refresh all but certain
+    assert asyncio.run(run()) == 36
+    assert calls == [6, 6]
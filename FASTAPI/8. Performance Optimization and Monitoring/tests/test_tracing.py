@@ -0,0 +1,91 @@
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from perfkit import server_timing
+from perfkit.server_timing import phase
+from perfkit.tracing import TracingSettings, setup_tracing
+
+pytest.importorskip('opentelemetry.sdk')
+pytest.importorskip('opentelemetry.instrumentation.fastapi')
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+
+
+def make_app():
+    app = FastAPI()
+
+    @app.get('/users/{user_id}')
+    def get_user(user_id: int):
+        with phase('db'):
+            pass
+        return {'id': user_id}
+
+    return app
+
+
+@pytest.fixture
+def traced(tmp_path, monkeypatch):
+    path = tmp_path / 'traces.jsonl'
+    monkeypatch.setenv('TRACING', '1')
+    monkeypatch.setenv('TRACING_EXPORTER', 'file')
+    monkeypatch.setenv('TRACING_FILE', str(path))
+    providers = []
+
+    def start(sample_ratio):
+        monkeypatch.setenv('TRACING_SAMPLE_RATIO', str(sample_ratio))
+        app = make_app()
+        providers.append(setup_tracing(app, 'test'))
+        return TestClient(app)
+
+    def spans():
+        providers[-1].force_flush()
+        if not path.exists():
+            return []
+        return [
+            span
+            for line in path.read_text().splitlines()
+            for resource in json.loads(line)['resourceSpans']
+            for scope in resource['scopeSpans']
+            for span in scope['spans']
+        ]
+
+    yield start, spans
+
+    from opentelemetry.instrumentation.redis import RedisInstrumentor
+    from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+    RedisInstrumentor().uninstrument()
+    HTTPXClientInstrumentor().uninstrument()
+    server_timing.trace_phases(None)
+    for provider in providers:
+        provider.shutdown()
+
+
+def test_disabled_by_default(monkeypatch):
+    monkeypatch.delenv('TRACING', raising=False)
+    assert setup_tracing(make_app(), 'test') is None
+    assert TracingSettings().enabled is False
+
+
+def test_phases_are_child_spans_of_the_request(traced):
+    start, spans = traced
+    client = start(1.0)
+    client.get('/users/1')
+
+    by_name = {span['name']: span for span in spans()}
+    request, db = by_name['GET /users/{user_id}'], by_name['db']
+    assert db['traceId'] == request['traceId']
+    assert db['parentSpanId'] == request['spanId']
+
+
+def test_sampling_ratio_follows_incoming_parent(traced):
+    start, spans = traced
+    client = start(0.0)
+    client.get('/users/1')
+    assert spans() == []
+
+    # a caller that sampled the trace keeps it sampled here
+    client.get('/users/2', headers={'traceparent': f'00-{TRACE_ID}-00f067aa0ba902b7-01'})
+    exported = spans()
+    assert exported
+    assert {span['traceId'] for span in exported} == {TRACE_ID}
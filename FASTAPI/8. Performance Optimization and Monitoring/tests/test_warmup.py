@@ -0,0 +1,34 @@
+import asyncio
+from prometheus_client import REGISTRY
+from perfkit.warmup import warm_up, hot_keys_from_log
+
+
+def test_hot_keys_are_ranked_by_frequency(tmp_path):
+    log = tmp_path / 'access.log'
+    log.write_text('user_id=7\n' * 3 + 'user_id=2\n' + 'user_id=9\n' * 2 + 'GET /health\n')
+    assert hot_keys_from_log(str(log), r'user_id=(\d+)', top_n=2) == ['7', '9']
+    assert hot_keys_from_log(str(tmp_path / 'missing.log'), r'(\d+)') == []
+
+
+def test_warm_up_bounds_concurrency_and_reports_progress():
+    store = {}
+    running = peak = 0
+
+    async def build(batch):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return [(f'k:{item}', item) for item in batch]
+
+    async def write(pairs):
+        store.update(pairs)
+
+    written = asyncio.run(warm_up('test', range(100), build, write, batch_size=10, concurrency=3))
+
+    assert written == 100
+    assert len(store) == 100
+    assert peak == 3
+    assert REGISTRY.get_sample_value('cache_warmup_progress_ratio', {'namespace': 'test'}) == 1
+    assert REGISTRY.get_sample_value('cache_warmup_duration_seconds', {'namespace': 'test'}) > 0